@@ -16,8 +16,6 @@ class PAINTERLY_OT_apply_effect(Operator):
         if not context.selected_objects:
             self.report({'ERROR'}, "No objects selected. Please select at least one object.")
             return {'CANCELLED'}
-            
-        props.update_min_max(context)
         
         normal_angle = props.normal_angle_internal
         if normal_angle > 180.0 or normal_angle < 0.0:
@@ -27,8 +25,8 @@ class PAINTERLY_OT_apply_effect(Operator):
         
         try:
             painterly_core.create_painterly_maps_with_shared_texture(
-                stroke_width_range=(props.stroke_width[0], props.stroke_width[1]),
-                stroke_length_range=(props.stroke_length[0], props.stroke_length[1]),
+                stroke_width_range=tuple(props.stroke_width),
+                stroke_length_range=tuple(props.stroke_length),
                 normal_angle_threshold=float(normal_angle),
                 color_variation=float(props.color_variation)
             )
@@ -83,4 +81,6 @@ def register():
 
 def unregister():
     for cls in reversed(classes):
-        bpy.utils.unregister_class(cls)
\ No newline at end of file
+        bpy.utils.unregister_class(cls)
+    
+    painterly_core.clear_texture_cache()
\ No newline at end of file
@@ -1,14 +1,38 @@
 import bpy
 import numpy as np
-import bmesh
-import numpy as np
 import os
-import random
 import math
-from mathutils import Vector
 from time import time
 from collections import defaultdict, deque
 
+# Blender's bundled Python doesn't ship numba; without it the NumPy paths are used
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        return lambda func: func
+    
+    prange = range
+
+# Per-pixel attributes written by the rasterizer. Normals are stored as int16 scaled by
+# NORMAL_SCALE, and UVs (clamped to 0-1) as uint16 fixed point scaled by UV_SCALE
+NORMAL_SCALE = 32767.0
+UV_SCALE = 65535.0
+PIXEL_ATTR_DTYPE = np.dtype([
+    ('normal', np.int16, 3),
+    ('uv', np.uint16, 2),
+    ('face_id', np.int32),
+    ('region_id', np.int32),
+    ('object', np.int32),
+], align=True)
+
+# Pixels of the last shared texture read, kept across calls:
+# image name -> (stamp, (pixel array, width, height)); holds at most one image
+_TEX_PIXEL_CACHE = {}
+
 
 def create_painterly_maps_with_shared_texture(
     stroke_width_range=(8, 15),
@@ -66,14 +90,19 @@ def create_painterly_maps_with_shared_texture(
     
     color_array = np.ones((resolution, resolution, 4), dtype=np.float32)
     
-    # Create a mask to track which pixels belong to which object
-    object_ownership = np.full((resolution, resolution), -1, dtype=np.int32)
+    # Store the owning object, normal, face ID, region ID and UV coordinates of each
+    # pixel packed together, so the rasterizer touches one 24-byte record per pixel;
+    # the per-field arrays below are views into it
+    pixel_attr = np.zeros((resolution, resolution), dtype=PIXEL_ATTR_DTYPE)
+    pixel_attr['object'] = -1
+    pixel_attr['face_id'] = -1
+    pixel_attr['region_id'] = -1
     
-    # Store normal data, face IDs, region IDs and UV coordinates for each pixel
-    normal_data = np.zeros((resolution, resolution, 3), dtype=np.float32)
-    face_id_data = np.full((resolution, resolution), -1, dtype=np.int32)
-    region_id_data = np.full((resolution, resolution), -1, dtype=np.int32)
-    uv_data = np.zeros((resolution, resolution, 2), dtype=np.float32)
+    object_ownership = pixel_attr['object']
+    normal_data = pixel_attr['normal']
+    face_id_data = pixel_attr['face_id']
+    region_id_data = pixel_attr['region_id']
+    uv_data = pixel_attr['uv']
     
     # Find a texture to cache (just need one for all objects)
     print("Searching for a texture to cache...")
@@ -90,12 +119,25 @@ def create_painterly_maps_with_shared_texture(
             width = texture_image.size[0]
             height = texture_image.size[1]
             
+            # Reuse the pixels from an earlier call if the image hasn't changed since
+            stamp = get_image_stamp(texture_image)
+            cached = _TEX_PIXEL_CACHE.get(texture_image.name_full)
+            if stamp is not None and cached and cached[0] == stamp:
+                shared_texture_data = cached[1]
+                print(f"Reusing cached texture: {width}x{height}")
+                break
+            
             try:
-                # Convert the flat pixels list to a numpy array and reshape
-                pixels = np.array(texture_image.pixels[:])
+                # Copy the pixels straight into a float32 array and reshape
+                pixels = np.empty(width * height * 4, dtype=np.float32)
+                texture_image.pixels.foreach_get(pixels)
                 texture_array = pixels.reshape((height, width, 4))
                 
                 shared_texture_data = (texture_array, width, height)
+                
+                # Only keep the current texture so old full-size copies are freed
+                _TEX_PIXEL_CACHE.clear()
+                _TEX_PIXEL_CACHE[texture_image.name_full] = (stamp, shared_texture_data)
                 print(f"Cached texture: {width}x{height}")
                 break
             except Exception as e:
@@ -106,9 +148,11 @@ def create_painterly_maps_with_shared_texture(
     else:
         print("No usable texture found, using default colors")
     
-    # Process each object to build face regions and fill the texture data
+    # Process each object to build face regions and collect its triangles; bpy is
+    # only used here, and all objects are rasterized together afterwards
     total_face_id_offset = 0
     total_region_id_offset = 0
+    object_triangles = []
     
     for obj_index, obj in enumerate(selected_objects):
         print(f"\nProcessing object {obj_index+1}/{len(selected_objects)}: {obj.name}")
@@ -129,466 +173,308 @@ def create_painterly_maps_with_shared_texture(
             bpy.ops.object.mode_set(mode='OBJECT')
             print(f"  UV unwrapping completed for {obj.name}")
         
-        # Create BMesh for this object
-        bm = bmesh.new()
-        bm.from_mesh(obj.data)
-        bm.faces.ensure_lookup_table()
+        mesh = obj.data
         
         # Make sure we have UV data
-        uv_layer = bm.loops.layers.uv.active
+        uv_layer = mesh.uv_layers.active
         if uv_layer is None:
             print(f"  Error: No active UV layer found for {obj.name} even after unwrapping")
-            bm.free()
             continue
         
-        # Calculate normals
-        bm.normal_update()
+        # Bulk-copy the face normals, loop UVs and loop/face/edge links into NumPy arrays
+        num_faces = len(mesh.polygons)
+        num_loops = len(mesh.loops)
         
-        # Step 1: Filter valid faces (with non-zero normals)
-        valid_faces = []
-        for face in bm.faces:
-            if face.normal.length > 0.001:  # Skip faces with zero-length normals
-                valid_faces.append(face)
-        
-        print(f"  Found {len(valid_faces)} valid faces out of {len(bm.faces)} total faces")
-        
-        # Step 2: Create face regions using union-find to ensure strict edge constraints
-        region_map = {}  # Maps face_id to region_id
-        next_region_id = 0
+        face_normals = np.empty(num_faces * 3, dtype=np.float32)
+        mesh.polygons.foreach_get("normal", face_normals)
+        face_normals = face_normals.reshape(-1, 3)
         
-        # Create a mapping of edge to its faces for quicker lookup
-        edge_to_faces = {}
-        for edge in bm.edges:
-            if len(edge.link_faces) == 2:
-                face1, face2 = edge.link_faces
-                if face1 in valid_faces and face2 in valid_faces:
-                    edge_to_faces[edge] = (face1, face2)
+        loop_totals = np.empty(num_faces, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_totals)
+        loop_faces = np.repeat(np.arange(num_faces, dtype=np.int32), loop_totals)
         
-        # First, assign each face to its own region
-        for face in valid_faces:
-            face_id = face.index + total_face_id_offset
-            region_map[face_id] = next_region_id + total_region_id_offset
-            next_region_id += 1
-        
-        # Convert angle threshold to radians
-        angle_threshold_radians = math.radians(normal_angle_threshold)
-        
-        # List of edges with similar normals
-        similar_edges = []
-        
-        # Find edges where faces have similar normals
-        for edge, (face1, face2) in edge_to_faces.items():
-            face1_id = face1.index + total_face_id_offset
-            face2_id = face2.index + total_face_id_offset
-            
-            # Compare face normals
-            normal1 = face1.normal
-            normal2 = face2.normal
-            
-            # Calculate angle between normals
-            cos_angle = normal1.dot(normal2)
-            # Handle numerical precision issues
-            cos_angle = max(-1.0, min(1.0, cos_angle))
-            angle = math.acos(cos_angle)
-            
-            # If angle is less than threshold, these faces should be in the same region
-            if angle <= angle_threshold_radians:
-                similar_edges.append((face1_id, face2_id))
+        loop_edges = np.empty(num_loops, dtype=np.int32)
+        mesh.loops.foreach_get("edge_index", loop_edges)
         
-        # Union-find data structure for merging regions
-        parent = {}
-        rank = {}
+        loop_uvs = np.empty(num_loops * 2, dtype=np.float32)
+        uv_layer.data.foreach_get("uv", loop_uvs)
+        loop_uvs = loop_uvs.reshape(-1, 2)
         
-        def find(x):
-            if x != parent[x]:
-                parent[x] = find(parent[x])
-            return parent[x]
+        # Step 1: Filter valid faces (with non-zero normals)
+        is_valid = np.linalg.norm(face_normals, axis=1) > 0.001  # Skip faces with zero-length normals
+        valid_faces = np.flatnonzero(is_valid)
         
-        def union(x, y):
-            root_x = find(x)
-            root_y = find(y)
-            if root_x != root_y:
-                if rank[root_x] < rank[root_y]:
-                    parent[root_x] = root_y
-                else:
-                    parent[root_y] = root_x
-                    if rank[root_x] == rank[root_y]:
-                        rank[root_x] += 1
+        print(f"  Found {len(valid_faces)} valid faces out of {num_faces} total faces")
         
-        # Initialize union-find
-        for face_id, region_id in region_map.items():
-            parent[region_id] = region_id
-            rank[region_id] = 0
+        # Step 2: Create face regions using union-find to ensure strict edge constraints
+        # Faces are addressed by their position in valid_faces
+        local_index = np.full(num_faces, -1, dtype=np.int32)
+        local_index[valid_faces] = np.arange(len(valid_faces), dtype=np.int32)
+        
+        # Group loops by edge; an edge used by exactly two loops joins two faces
+        order = np.argsort(loop_edges, kind='stable')
+        _, edge_starts, edge_counts = np.unique(loop_edges[order], return_index=True, return_counts=True)
+        shared = edge_starts[edge_counts == 2]
+        face1 = loop_faces[order[shared]]
+        face2 = loop_faces[order[shared + 1]]
+        both_valid = is_valid[face1] & is_valid[face2]
+        face1, face2 = face1[both_valid], face2[both_valid]
+        
+        # Cosine falls as the angle grows, so compare cosines instead of taking acos
+        cos_threshold = math.cos(math.radians(normal_angle_threshold))
+        cos_angles = np.einsum('ij,ij->i', face_normals[face1], face_normals[face2])
+        
+        # If angle is less than threshold, these faces should be in the same region
+        similar = cos_angles >= cos_threshold
+        similar_edges = np.stack((local_index[face1[similar]], local_index[face2[similar]]), axis=1)
         
         # Merge regions for faces with similar normals
-        for face1_id, face2_id in similar_edges:
-            region1 = region_map[face1_id]
-            region2 = region_map[face2_id]
-            union(region1, region2)
+        parent = np.arange(len(valid_faces), dtype=np.int32)
+        dsu_union_pairs(parent, similar_edges)
         
-        # Update region_map with final region assignments
-        for face_id in region_map:
-            region_map[face_id] = find(region_map[face_id])
+        # Compact region IDs (make them sequential); every root is the lowest face index
+        # of its region, so numbering the roots in order keeps first-seen order
+        _, compact_ids = np.unique(dsu_resolve(parent), return_inverse=True)
+        region_ids = compact_ids.astype(np.int32) + total_region_id_offset
         
-        # Compact region IDs (make them sequential)
-        region_id_remapping = {}
-        next_compact_id = total_region_id_offset
+        final_region_count = int(compact_ids.max()) + 1 if len(compact_ids) else 0
+        next_compact_id = total_region_id_offset + final_region_count
+        print(f"  Created {final_region_count} distinct face regions after merging")
         
-        for face_id, region_id in region_map.items():
-            if region_id not in region_id_remapping:
-                region_id_remapping[region_id] = next_compact_id
-                next_compact_id += 1
-            
-            # Update the region map with compact IDs
-            region_map[face_id] = region_id_remapping[region_id]
+        # Step 3: Collect the triangles of the valid faces, with their UVs
+        mesh.calc_loop_triangles()
+        num_tris = len(mesh.loop_triangles)
+        tri_loops = np.empty(num_tris * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("loops", tri_loops)
+        tri_faces = np.empty(num_tris, dtype=np.int32)
+        mesh.loop_triangles.foreach_get("polygon_index", tri_faces)
         
-        final_region_count = len(region_id_remapping)
-        print(f"  Created {final_region_count} distinct face regions after merging")
+        keep = is_valid[tri_faces]
+        tri_loops = tri_loops.reshape(-1, 3)[keep]
+        tri_faces = tri_faces[keep]
+        tri_uvs = loop_uvs[tri_loops].astype(np.float64)
         
-        # Step 3: Fill the texture data
-        print("  Filling texture data...")
+        face_region_ids = np.full(num_faces, -1, dtype=np.int32)
+        face_region_ids[valid_faces] = region_ids
         
-        for face in valid_faces:
-            face_id = face.index + total_face_id_offset
-            region_id = region_map.get(face_id, -1)
-            
-            # Get face normal
-            face_normal = face.normal
-            
-            # Get UVs for this face
-            uvs = [loop[uv_layer].uv for loop in face.loops]
-            pixel_uvs = [(uv.x * (resolution-1), uv.y * (resolution-1)) for uv in uvs]
-            
-            # Triangulate the face
-            for i in range(1, len(face.loops) - 1):
-                tri_uvs = [pixel_uvs[0], pixel_uvs[i], pixel_uvs[i+1]]
-                tri_real_uvs = [uvs[0], uvs[i], uvs[i+1]]  # Store original UVs (0-1 range)
-                
-                # Calculate expanded bounding box with 1px margin for the triangle
-                min_x = max(0, int(min(x for x, y in tri_uvs) - 1))
-                max_x = min(resolution-1, int(max(x for x, y in tri_uvs) + 1))
-                min_y = max(0, int(min(y for x, y in tri_uvs) - 1))
-                max_y = min(resolution-1, int(max(y for x, y in tri_uvs) + 1))
-                
-                # Test each pixel in the bounding box
-                for y in range(min_y, max_y + 1):
-                    for x in range(min_x, max_x + 1):
-                        # Check if any corner of the pixel is inside the triangle
-                        pixel_corners = [
-                            (x - 0.5, y - 0.5),  # Bottom-left
-                            (x + 0.5, y - 0.5),  # Bottom-right
-                            (x - 0.5, y + 0.5),  # Top-left
-                            (x + 0.5, y + 0.5)   # Top-right
-                        ]
-                        
-                        inside = False
-                        for corner in pixel_corners:
-                            if is_point_in_triangle_float(corner, tri_uvs):
-                                inside = True
-                                break
-                                
-                        # If no corner is inside, check if the center is inside
-                        if not inside and is_point_in_triangle_float((x, y), tri_uvs):
-                            inside = True
-                            
-                        # Also check edge intersections
-                        if not inside:
-                            pixel_edges = [
-                                (pixel_corners[0], pixel_corners[1]),  # Bottom
-                                (pixel_corners[1], pixel_corners[3]),  # Right
-                                (pixel_corners[3], pixel_corners[2]),  # Top
-                                (pixel_corners[2], pixel_corners[0])   # Left
-                            ]
-                            
-                            tri_edges = [
-                                (tri_uvs[0], tri_uvs[1]),
-                                (tri_uvs[1], tri_uvs[2]),
-                                (tri_uvs[2], tri_uvs[0])
-                            ]
-                            
-                            for p_edge in pixel_edges:
-                                for t_edge in tri_edges:
-                                    if lines_intersect(p_edge[0], p_edge[1], t_edge[0], t_edge[1]):
-                                        inside = True
-                                        break
-                                if inside:
-                                    break
-                        
-                        if inside:
-                            # This pixel is at least partially covered by the triangle
-                            # Calculate barycentric coordinates to interpolate the UV values
-                            center = (x, y)
-                            uvw = get_barycentric_coords(center, tri_uvs)
-                            
-                            if uvw is not None:
-                                # Interpolate UV coordinates
-                                u = tri_real_uvs[0].x * uvw[0] + tri_real_uvs[1].x * uvw[1] + tri_real_uvs[2].x * uvw[2]
-                                v = tri_real_uvs[0].y * uvw[0] + tri_real_uvs[1].y * uvw[1] + tri_real_uvs[2].y * uvw[2]
-                                
-                                # Store data for this pixel
-                                object_ownership[y, x] = obj_index
-                                normal_data[y, x] = [face_normal.x, face_normal.y, face_normal.z]
-                                face_id_data[y, x] = face_id
-                                region_id_data[y, x] = region_id
-                                uv_data[y, x] = [u, v]  # Store UV coordinates for later texture sampling
+        object_triangles.append((
+            tri_uvs, face_normals[tri_faces], tri_faces + np.int32(total_face_id_offset),
+            face_region_ids[tri_faces], np.full(len(tri_faces), obj_index, dtype=np.int32)
+        ))
         
         # Update offsets for next object
-        total_face_id_offset += len(bm.faces)
+        total_face_id_offset += num_faces
         total_region_id_offset = next_compact_id
-        
-        bm.free()
+    
+    # Fill the texture data for all objects in one pass; triangles keep their object
+    # order, so where objects overlap in UV space the later object still wins
+    print("\nFilling texture data...")
+    if object_triangles:
+        tri_uvs, tri_normals, tri_face_ids, tri_region_ids, tri_objects = (
+            np.concatenate(parts) for parts in zip(*object_triangles)
+        )
+        if len(tri_uvs):
+            rasterize_triangles(
+                tri_uvs * (resolution - 1), tri_uvs, tri_normals, tri_face_ids, tri_region_ids,
+                tri_objects, resolution,
+                object_ownership, normal_data, face_id_data, region_id_data, uv_data
+            )
     
     # Now generate brush strokes constrained to face regions
     print("\nGenerating brush strokes constrained to face regions...")
     
-    for obj_index, obj in enumerate(selected_objects):
-        print(f"Adding brush strokes for object {obj_index+1}/{len(selected_objects)}: {obj.name}")
-        
-        # Get base color as fallback
-        base_color = get_object_base_color(obj)
-        
-        # Find all pixels owned by this object
-        obj_pixels = np.argwhere(object_ownership == obj_index)
-        
-        if len(obj_pixels) == 0:
-            print(f"  No pixels found for object {obj.name}")
-            continue
-        
-        print(f"  Found {len(obj_pixels)} pixels for object {obj.name}")
-        
-        # Get all regions for this object
-        object_regions = set()
-        for y, x in obj_pixels:
-            region_id = region_id_data[y, x]
-            if region_id >= 0:
-                object_regions.add(region_id)
-        
-        print(f"  Object has {len(object_regions)} regions")
-        
-        # Process each region separately to ensure strokes stay within regions
-        for region_id in object_regions:
-            # Get pixels for this region
-            region_pixels = [(y, x) for y, x in obj_pixels if region_id_data[y, x] == region_id]
-            
-            if len(region_pixels) < 10:  # Skip very small regions
-                continue
-                
-            print(f"  Processing region {region_id} with {len(region_pixels)} pixels")
-            
-            # Create a set for faster lookup
-            region_pixels_set = set(region_pixels)
-            
-            # Calculate grid size based on stroke dimensions
-            avg_stroke_width = (stroke_width_range[0] + stroke_width_range[1]) / 2
-            avg_stroke_length = (stroke_length_range[0] + stroke_length_range[1]) / 2
-            
-            grid_size = int(min(avg_stroke_length, avg_stroke_width) * 0.6)
-            grid_size = max(5, grid_size)  # Ensure reasonable grid size
-            
-            # Create a dictionary to track which grid cells are covered
-            coverage_grid = {}
-            
-            # Create boundaries for the region
-            min_x = min(x for _, x in region_pixels)
-            max_x = max(x for _, x in region_pixels)
-            min_y = min(y for y, _ in region_pixels)
-            max_y = max(y for y, _ in region_pixels)
-            
-            # Place strokes in a grid pattern over the region
-            for grid_y in range(min_y, max_y + 1, grid_size):
-                for grid_x in range(min_x, max_x + 1, grid_size):
-                    grid_key = (grid_x // grid_size, grid_y // grid_size)
-                    
-                    # Skip if this grid cell is already covered
-                    if grid_key in coverage_grid:
-                        continue
-                    
-                    # Find a pixel in this grid cell that belongs to the region
-                    best_pixel = None
-                    
-                    # Try center of grid cell first
-                    center_x = grid_x + grid_size // 2
-                    center_y = grid_y + grid_size // 2
-                    
-                    if (center_y, center_x) in region_pixels_set:
-                        best_pixel = (center_y, center_x)
-                    else:
-                        # Search for any pixel in this cell that belongs to the region
-                        for y in range(grid_y, min(grid_y + grid_size, resolution)):
-                            for x in range(grid_x, min(grid_x + grid_size, resolution)):
-                                if (y, x) in region_pixels_set:
-                                    best_pixel = (y, x)
-                                    break
-                            if best_pixel:
-                                break
-                    
-                    if not best_pixel:
-                        continue
-                    
-                    y, x = best_pixel
-                    
-                    # Get the normal for this pixel
-                    normal_vec = normal_data[y, x]
-                    normal = Vector((normal_vec[0], normal_vec[1], normal_vec[2]))
-                    
-                    if normal.length < 0.001:
-                        continue
-                        
-                    normal.normalize()
-                    
-                    # Get UV coordinates for this pixel
-                    u, v = uv_data[y, x]
-                    
-                    # Sample texture color from cached data if available
-                    if shared_texture_data:
-                        texture_color = sample_cached_texture(shared_texture_data, u, v)
-                    else:
-                        texture_color = base_color
-                    
-                    # Calculate stroke direction (tangent to normal)
-                    up = Vector((0, 0, 1))
-                    tangent = normal.cross(up)
-                    if tangent.length < 0.001:
-                        tangent = Vector((1, 0, 0))
-                    else:
-                        tangent.normalize()
-                    
-                    # Add randomness to direction
-                    angle = math.atan2(tangent.y, tangent.x) + random.uniform(-math.pi/4, math.pi/4)
-                    dir_x = math.cos(angle)
-                    dir_y = math.sin(angle)
-                    
-                    # Stroke parameters - random width and length
-                    stroke_width = random.randint(stroke_width_range[0], stroke_width_range[1])
-                    stroke_length = random.randint(stroke_length_range[0], stroke_length_range[1])
-                    
-                    # Calculate stroke endpoints
-                    half_length = stroke_length / 2
-                    x0 = int(x - dir_x * half_length)
-                    y0 = int(y - dir_y * half_length)
-                    x1 = int(x + dir_x * half_length)
-                    y1 = int(y + dir_y * half_length)
-                    
-                    # Colors
-                    normal_color = np.array([
-                        normal.x * 0.5 + 0.5,
-                        normal.y * 0.5 + 0.5,
-                        normal.z * 0.5 + 0.5,
-                        1.0
-                    ])
-                    
-                    # Varied texture color with less variation for more consistency
-                    color_variation = np.random.uniform(-color_variation, color_variation, 3)
-                    varied_color = np.array([
-                        max(0.0, min(1.0, texture_color[0] + color_variation[0])),
-                        max(0.0, min(1.0, texture_color[1] + color_variation[1])),
-                        max(0.0, min(1.0, texture_color[2] + color_variation[2])),
-                        1.0
-                    ])
-                    
-                    # Draw the brush strokes constrained to this region
-                    draw_brush_stroke_in_region(
-                        normal_array, x0, y0, x1, y1, normal_color, stroke_width, 
-                        resolution, region_id_data, region_id
-                    )
-                    draw_brush_stroke_in_region(
-                        color_array, x0, y0, x1, y1, varied_color, stroke_width,
-                        resolution, region_id_data, region_id
-                    )
-                    
-                    # Mark this grid cell as covered
-                    coverage_grid[grid_key] = True
-            
-            # Add some random strokes for variety within each region
-            num_random_strokes = len(region_pixels) // 800  # Fewer random strokes
-            
-            if num_random_strokes > 0:
-                print(f"  Adding {num_random_strokes} random strokes to region {region_id}")
-                
-                for _ in range(num_random_strokes):
-                    # Pick a random pixel in this region
-                    if not region_pixels:
-                        continue
-                        
-                    idx = random.randint(0, len(region_pixels) - 1)
-                    y, x = region_pixels[idx]
-                    
-                    normal_vec = normal_data[y, x]
-                    if np.sum(normal_vec**2) < 0.001:
-                        continue
-                        
-                    normal = Vector(normal_vec)
-                    normal.normalize()
-                    
-                    # Get UV coordinates for this pixel
-                    u, v = uv_data[y, x]
-                    
-                    # Sample texture color from cached data if available
-                    if shared_texture_data:
-                        texture_color = sample_cached_texture(shared_texture_data, u, v)
-                    else:
-                        texture_color = base_color
-                    
-                    # Random direction with some influence from the normal
-                    if random.random() < 0.7:  # 70% chance to align with normal
-                        up = Vector((0, 0, 1))
-                        tangent = normal.cross(up)
-                        if tangent.length < 0.001:
-                            tangent = Vector((1, 0, 0))
-                        else:
-                            tangent.normalize()
-                        angle = math.atan2(tangent.y, tangent.x) + random.uniform(-math.pi/3, math.pi/3)
-                    else:
-                        # Completely random direction
-                        angle = random.uniform(0, 2 * math.pi)
-                        
-                    dir_x = math.cos(angle)
-                    dir_y = math.sin(angle)
-                    
-                    # Random stroke parameters - shorter for random strokes
-                    stroke_width = random.randint(stroke_width_range[0], stroke_width_range[1])
-                    stroke_length = random.randint(stroke_length_range[0] // 2, stroke_length_range[1] // 2)
-                    
-                    # Calculate stroke endpoints
-                    half_length = stroke_length / 2
-                    x0 = int(x - dir_x * half_length)
-                    y0 = int(y - dir_y * half_length)
-                    x1 = int(x + dir_x * half_length)
-                    y1 = int(y + dir_y * half_length)
-                    
-                    # Colors
-                    normal_color = np.array([
-                        normal.x * 0.5 + 0.5,
-                        normal.y * 0.5 + 0.5,
-                        normal.z * 0.5 + 0.5,
-                        1.0
-                    ])
-                    
-                    # More varied color for random strokes
-                    color_variation = np.random.uniform(-color_variation, color_variation, 3)
-                    varied_color = np.array([
-                        max(0.0, min(1.0, texture_color[0] + color_variation[0])),
-                        max(0.0, min(1.0, texture_color[1] + color_variation[1])),
-                        max(0.0, min(1.0, texture_color[2] + color_variation[2])),
-                        1.0
-                    ])
-                    
-                    # Draw random brush strokes constrained to this region
-                    draw_brush_stroke_in_region(
-                        normal_array, x0, y0, x1, y1, normal_color, stroke_width, 
-                        resolution, region_id_data, region_id, opacity=0.7
-                    )
-                    draw_brush_stroke_in_region(
-                        color_array, x0, y0, x1, y1, varied_color, stroke_width,
-                        resolution, region_id_data, region_id, opacity=0.7
-                    )
-    
-    # Convert numpy arrays to Blender pixels
-    normal_pixels = normal_array.flatten()
-    color_pixels = color_array.flatten()
-    
-    normal_map.pixels = normal_pixels.tolist()
-    color_map.pixels = color_pixels.tolist()
+    # Stroke parameters for every region are drawn at once from one generator
+    rng = np.random.default_rng()
+    
+    # Get base colors as fallback
+    base_colors = np.array([get_object_base_color(obj) for obj in selected_objects], dtype=np.float64)
+    
+    # Group all covered pixels by region with one stable sort, so each region's
+    # pixels are a contiguous run that stays in row-major order
+    region_flat = region_id_data.ravel()
+    pixel_indices = np.flatnonzero(region_flat >= 0)
+    order = np.argsort(region_flat[pixel_indices], kind='stable')
+    pixel_indices = pixel_indices[order]
+    regions, region_starts, region_counts = np.unique(
+        region_flat[pixel_indices], return_index=True, return_counts=True
+    )
+    
+    # Skip very small regions
+    large = region_counts >= 10
+    pixel_indices = pixel_indices[np.repeat(large, region_counts)]
+    regions = regions[large]
+    region_counts = region_counts[large]
+    region_starts = np.cumsum(region_counts) - region_counts
+    pixel_ys = pixel_indices // resolution
+    pixel_xs = pixel_indices % resolution
+    
+    print(f"  Found {len(pixel_indices)} pixels in {len(regions)} regions")
+    
+    # Calculate grid size based on stroke dimensions
+    avg_stroke_width = (stroke_width_range[0] + stroke_width_range[1]) / 2
+    avg_stroke_length = (stroke_length_range[0] + stroke_length_range[1]) / 2
+    
+    grid_size = int(min(avg_stroke_length, avg_stroke_width) * 0.6)
+    grid_size = max(5, grid_size)  # Ensure reasonable grid size
+    
+    # Place each region's grid at the corner of its bounding box; the first pixel of
+    # a region has its lowest row
+    region_min_xs = np.minimum.reduceat(pixel_xs, region_starts) if len(regions) else pixel_xs
+    region_min_ys = pixel_ys[region_starts]
+    local_xs = pixel_xs - np.repeat(region_min_xs, region_counts)
+    local_ys = pixel_ys - np.repeat(region_min_ys, region_counts)
+    cells_per_row = resolution // grid_size + 1
+    pixel_cells = (np.repeat(np.arange(len(regions)), region_counts) * cells_per_row * cells_per_row
+                   + (local_ys // grid_size) * cells_per_row + local_xs // grid_size)
+    
+    # Pick one seed pixel per grid cell: the center of the cell if it belongs to the
+    # region, otherwise the first pixel of the cell that does
+    cell_offsets = (local_ys % grid_size) * grid_size + local_xs % grid_size
+    center_offset = (grid_size // 2) * grid_size + grid_size // 2
+    cell_offsets[cell_offsets == center_offset] = -1
+    order = np.lexsort((cell_offsets, pixel_cells))
+    first_in_cell = np.flatnonzero(np.diff(pixel_cells[order], prepend=-1) != 0)
+    seeds = order[first_in_cell]
+    seed_ys = pixel_ys[seeds]
+    seed_xs = pixel_xs[seeds]
+    
+    # Drop seeds without a usable normal
+    normals = normal_data[seed_ys, seed_xs] / NORMAL_SCALE
+    normal_lengths = np.sqrt(np.einsum('ij,ij->i', normals, normals))
+    keep = normal_lengths >= 0.001
+    seed_ys = seed_ys[keep]
+    seed_xs = seed_xs[keep]
+    normals = normals[keep] / normal_lengths[keep, None]
+    num_strokes = len(seed_ys)
+    
+    print(f"  Adding {num_strokes} grid strokes")
+    
+    # Sample texture color from cached data if available
+    if shared_texture_data:
+        seed_uvs = uv_data[seed_ys, seed_xs] / UV_SCALE
+        texture_colors = sample_cached_texture(shared_texture_data, seed_uvs[:, 0], seed_uvs[:, 1])
+    else:
+        texture_colors = base_colors[object_ownership[seed_ys, seed_xs]]
+    
+    # Stroke direction is the tangent normal x (0, 0, 1) = (ny, -nx, 0),
+    # falling back to +x where the normal points straight up
+    tangent_lengths = np.hypot(normals[:, 0], normals[:, 1])
+    angles = np.where(tangent_lengths < 0.001, 0.0,
+                      np.arctan2(-normals[:, 0], normals[:, 1]))
+    angles += rng.uniform(-math.pi/4, math.pi/4, num_strokes)
+    
+    # Stroke parameters - random width and length
+    stroke_widths = rng.integers(stroke_width_range[0], stroke_width_range[1] + 1, num_strokes)
+    stroke_lengths = rng.integers(stroke_length_range[0], stroke_length_range[1] + 1, num_strokes)
+    
+    # Calculate stroke endpoints
+    half_lengths = stroke_lengths / 2
+    offset_x = np.cos(angles) * half_lengths
+    offset_y = np.sin(angles) * half_lengths
+    x0s = (seed_xs - offset_x).astype(np.int64)
+    y0s = (seed_ys - offset_y).astype(np.int64)
+    x1s = (seed_xs + offset_x).astype(np.int64)
+    y1s = (seed_ys + offset_y).astype(np.int64)
+    stroke_regions = region_id_data[seed_ys, seed_xs]
+    
+    # Colors
+    normal_colors = np.ones((num_strokes, 4), dtype=np.float32)
+    normal_colors[:, :3] = normals * 0.5 + 0.5
+    
+    # Varied texture color with less variation for more consistency
+    varied_colors = np.ones((num_strokes, 4), dtype=np.float32)
+    varied_colors[:, :3] = np.clip(
+        texture_colors + rng.uniform(-color_variation, color_variation, (num_strokes, 3)),
+        0.0, 1.0
+    )
+    
+    # Draw the brush strokes, each constrained to its region. Strokes of different
+    # regions never touch the same pixels, so only the order within a region matters
+    draw_strokes_in_regions(
+        normal_array, x0s, y0s, x1s, y1s, normal_colors, stroke_widths, stroke_regions,
+        resolution, region_id_data
+    )
+    draw_strokes_in_regions(
+        color_array, x0s, y0s, x1s, y1s, varied_colors, stroke_widths, stroke_regions,
+        resolution, region_id_data
+    )
+    
+    # Add some random strokes for variety within each region, drawn after all of
+    # the grid strokes
+    random_counts = region_counts // 800  # Fewer random strokes
+    
+    # Pick random pixels in each region
+    picks = rng.integers(np.repeat(region_starts, random_counts),
+                         np.repeat(region_starts + region_counts, random_counts))
+    pick_ys = pixel_ys[picks]
+    pick_xs = pixel_xs[picks]
+    
+    normals = normal_data[pick_ys, pick_xs] / NORMAL_SCALE
+    normal_lengths_sq = np.einsum('ij,ij->i', normals, normals)
+    keep = normal_lengths_sq >= 0.001
+    pick_ys = pick_ys[keep]
+    pick_xs = pick_xs[keep]
+    normals = normals[keep] / np.sqrt(normal_lengths_sq[keep, None])
+    num_strokes = len(pick_ys)
+    
+    print(f"  Adding {num_strokes} random strokes")
+    
+    # Sample texture color from cached data if available
+    if shared_texture_data:
+        seed_uvs = uv_data[pick_ys, pick_xs] / UV_SCALE
+        texture_colors = sample_cached_texture(shared_texture_data, seed_uvs[:, 0], seed_uvs[:, 1])
+    else:
+        texture_colors = base_colors[object_ownership[pick_ys, pick_xs]]
+    
+    # Random direction with some influence from the normal:
+    # 70% chance to align with the tangent, otherwise completely random
+    tangent_lengths = np.hypot(normals[:, 0], normals[:, 1])
+    aligned_angles = np.where(tangent_lengths < 0.001, 0.0,
+                              np.arctan2(-normals[:, 0], normals[:, 1]))
+    aligned_angles += rng.uniform(-math.pi/3, math.pi/3, num_strokes)
+    angles = np.where(rng.random(num_strokes) < 0.7, aligned_angles,
+                      rng.uniform(0, 2 * math.pi, num_strokes))
+    
+    # Random stroke parameters - shorter for random strokes
+    stroke_widths = rng.integers(stroke_width_range[0], stroke_width_range[1] + 1, num_strokes)
+    stroke_lengths = rng.integers(stroke_length_range[0] // 2, stroke_length_range[1] // 2 + 1,
+                                  num_strokes)
+    
+    # Calculate stroke endpoints
+    half_lengths = stroke_lengths / 2
+    offset_x = np.cos(angles) * half_lengths
+    offset_y = np.sin(angles) * half_lengths
+    x0s = (pick_xs - offset_x).astype(np.int64)
+    y0s = (pick_ys - offset_y).astype(np.int64)
+    x1s = (pick_xs + offset_x).astype(np.int64)
+    y1s = (pick_ys + offset_y).astype(np.int64)
+    stroke_regions = region_id_data[pick_ys, pick_xs]
+    
+    # Colors
+    normal_colors = np.ones((num_strokes, 4), dtype=np.float32)
+    normal_colors[:, :3] = normals * 0.5 + 0.5
+    
+    # More varied color for random strokes
+    varied_colors = np.ones((num_strokes, 4), dtype=np.float32)
+    varied_colors[:, :3] = np.clip(
+        texture_colors + rng.uniform(-color_variation, color_variation, (num_strokes, 3)),
+        0.0, 1.0
+    )
+    
+    # Draw random brush strokes, each constrained to its region
+    draw_strokes_in_regions(
+        normal_array, x0s, y0s, x1s, y1s, normal_colors, stroke_widths, stroke_regions,
+        resolution, region_id_data, opacity=0.7
+    )
+    draw_strokes_in_regions(
+        color_array, x0s, y0s, x1s, y1s, varied_colors, stroke_widths, stroke_regions,
+        resolution, region_id_data, opacity=0.7
+    )
+    
+    
+    # Copy the numpy arrays straight into the Blender pixel buffers
+    normal_map.pixels.foreach_set(np.ascontiguousarray(normal_array, dtype=np.float32).ravel())
+    color_map.pixels.foreach_set(np.ascontiguousarray(color_array, dtype=np.float32).ravel())
     
     # Save to desktop
     desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
@@ -614,28 +500,26 @@ def create_painterly_maps_with_shared_texture(
     
     return normal_map, color_map
 
-def sample_cached_texture(cached_data, u, v):
-    """Sample from the cached texture array using UV coordinates"""
+def sample_cached_texture(cached_data, us, vs):
+    """Sample RGB colors from the cached texture array at arrays of UV coordinates"""
     texture_array, width, height = cached_data
     
-    # Calculate pixel position (clamped to texture boundaries)
-    x = max(0, min(width - 1, int(u * width)))
-    y = max(0, min(height - 1, int(v * height)))
+    # Calculate pixel positions (clamped to texture boundaries)
+    xs = np.clip((us * width).astype(np.int32), 0, width - 1)
+    ys = np.clip((vs * height).astype(np.int32), 0, height - 1)
     
-    # Get pixel color (RGB)
-    try:
-        pixel = texture_array[y, x, :3]  # Just take RGB
-        return (pixel[0], pixel[1], pixel[2])
-    except:
-        return (0.5, 0.5, 0.5)  # Default gray if access fails
+    # Gather the pixel colors (RGB)
+    return texture_array[ys, xs, :3]
 
 def get_texture_from_material(obj):
     """Extract the color texture from the material if available"""
     if not obj.material_slots or not obj.material_slots[0].material:
         return None
     
-    mat = obj.material_slots[0].material
-    
+    return find_material_texture(obj.material_slots[0].material)
+
+def find_material_texture(mat):
+    """Find the image texture feeding the material's base color, if any"""
     # Check if the material uses nodes
     if not mat.use_nodes:
         return None
@@ -704,6 +588,27 @@ def get_texture_from_material(obj):
     
     return None
 
+def clear_texture_cache():
+    """Free the cached texture pixels"""
+    _TEX_PIXEL_CACHE.clear()
+
+def get_image_stamp(image):
+    """
+    Identify the current contents of an image for the pixel cache.
+    
+    Only unpacked images backed by a file on disk get a stamp. Returns None for
+    generated, packed or otherwise sourced images and for images with unsaved
+    edits, since their pixels can change without the stamp changing; those are
+    always re-read.
+    """
+    if image.is_dirty or image.source != 'FILE' or image.packed_file:
+        return None
+    
+    path = bpy.path.abspath(image.filepath)
+    if not os.path.exists(path):
+        return None
+    return (tuple(image.size), image.filepath, os.path.getmtime(path))
+
 def get_object_base_color(obj):
     """Get a fallback base color if texture sampling fails"""
     if not obj.material_slots or not obj.material_slots[0].material:
@@ -746,41 +651,12 @@ def draw_brush_stroke_in_region(image_array, x0, y0, x1, y1, color, thickness, r
     if line_length == 0:
         line_length = 1
     
-    # For each point on the line
+    # Collect the points on the line
     x, y = x0, y0
-    step_count = 0
+    points = []
     
     while True:
-        # Skip points outside the region
-        if 0 <= y < resolution and 0 <= x < resolution and region_id_data[y, x] == region_id:
-            # Calculate position along the line (0 to 1)
-            t = step_count / line_length
-            
-            # Taper the stroke width - thicker in middle, thinner at ends
-            local_thickness = int(thickness * (1.0 - 0.5 * (2*t - 1)**2))
-            local_thickness = max(1, local_thickness)
-            
-            # Define bounds of the brush square
-            half_t = local_thickness // 2
-            min_x = max(0, x - half_t)
-            max_x = min(resolution - 1, x + half_t)
-            min_y = max(0, y - half_t)
-            max_y = min(resolution - 1, y + half_t)
-            
-            # Create a slice for the brush region
-            region = image_array[min_y:max_y+1, min_x:max_x+1]
-            mask_region = region_id_data[min_y:max_y+1, min_x:max_x+1]
-            
-            # Create mask for region
-            region_mask = (mask_region == region_id)
-            
-            # Apply color blending only where the mask is True
-            if np.any(region_mask):
-                for c in range(3):  # For R, G, B channels
-                    region[region_mask, c] = region[region_mask, c] * (1 - opacity) + color[c] * opacity
-                
-                # Set alpha to 1.0
-                region[region_mask, 3] = 1.0
+        points.append((x, y))
         
         # Exit condition
         if x == x1 and y == y1:
@@ -794,73 +670,343 @@ def draw_brush_stroke_in_region(image_array, x0, y0, x1, y1, color, thickness, r
         if e2 < dx:
             err += dx
             y += sy
+    
+    # Skip points outside the region
+    points = np.array(points)
+    steps = np.arange(len(points))
+    inside = region_id_data[points[:, 1], points[:, 0]] == region_id
+    if not inside.any():
+        return
+    xs, ys, steps = points[inside, 0], points[inside, 1], steps[inside]
+    
+    # Taper the stroke width - thicker in middle, thinner at ends
+    t = steps / line_length
+    local_thickness = np.maximum(1, (thickness * (1.0 - 0.5 * (2*t - 1)**2)).astype(np.int64))
+    
+    # Bounds of the brush square at each point
+    half_t = local_thickness // 2
+    min_xs = np.maximum(0, xs - half_t)
+    max_xs = np.minimum(resolution - 1, xs + half_t)
+    min_ys = np.maximum(0, ys - half_t)
+    max_ys = np.minimum(resolution - 1, ys + half_t)
+    
+    # Count how many brush squares cover each pixel of the stroke's bounding box,
+    # by adding each square's corners into a difference array and summing it up
+    box_x, box_y = min_xs.min(), min_ys.min()
+    box_w, box_h = max_xs.max() - box_x + 1, max_ys.max() - box_y + 1
+    coverage = np.zeros((box_h + 1, box_w + 1), dtype=np.int32)
+    np.add.at(coverage, (min_ys - box_y, min_xs - box_x), 1)
+    np.add.at(coverage, (min_ys - box_y, max_xs + 1 - box_x), -1)
+    np.add.at(coverage, (max_ys + 1 - box_y, min_xs - box_x), -1)
+    np.add.at(coverage, (max_ys + 1 - box_y, max_xs + 1 - box_x), 1)
+    coverage = coverage.cumsum(axis=0).cumsum(axis=1)[:box_h, :box_w]
+    
+    region = image_array[box_y:box_y + box_h, box_x:box_x + box_w]
+    mask = (coverage > 0) & (region_id_data[box_y:box_y + box_h, box_x:box_x + box_w] == region_id)
+    
+    # Blending the same color in n times leaves (1 - opacity)^n of the old color
+    remaining = ((1 - opacity) ** coverage[mask])[:, None]
+    rgb = np.asarray(color[:3], dtype=image_array.dtype)
+    region[mask, :3] = rgb + (region[mask, :3] - rgb) * remaining
+    
+    # Set alpha to 1.0
+    region[mask, 3] = 1.0
+
+def draw_strokes_in_regions(image_array, x0s, y0s, x1s, y1s, colors, thicknesses, stroke_regions,
+                            resolution, region_id_data, opacity=0.8):
+    """Draw a batch of brush strokes in order, each constrained to its own region"""
+    if HAVE_NUMBA:
+        _draw_strokes_in_regions(
+            image_array, np.asarray(x0s, dtype=np.int64), np.asarray(y0s, dtype=np.int64),
+            np.asarray(x1s, dtype=np.int64), np.asarray(y1s, dtype=np.int64),
+            np.asarray(colors, dtype=np.float32), np.asarray(thicknesses, dtype=np.int64),
+            np.asarray(stroke_regions, dtype=np.int32), resolution, region_id_data, opacity
+        )
+        return
+    
+    for i in range(len(x0s)):
+        draw_brush_stroke_in_region(
+            image_array, int(x0s[i]), int(y0s[i]), int(x1s[i]), int(y1s[i]), colors[i],
+            int(thicknesses[i]), resolution, region_id_data, stroke_regions[i], opacity
+        )
+
+@njit(cache=True)
+def _draw_strokes_in_regions(image_array, x0s, y0s, x1s, y1s, colors, thicknesses, stroke_regions,
+                             resolution, region_id_data, opacity):
+    """Compiled loop doing what draw_brush_stroke_in_region does, for every stroke"""
+    for i in range(len(x0s)):
+        region_id = stroke_regions[i]
+        x0 = max(0, min(resolution-1, x0s[i]))
+        y0 = max(0, min(resolution-1, y0s[i]))
+        x1 = max(0, min(resolution-1, x1s[i]))
+        y1 = max(0, min(resolution-1, y1s[i]))
+        
+        dx = abs(x1 - x0)
+        dy = abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx - dy
+        
+        line_length = math.sqrt(dx*dx + dy*dy)
+        if line_length == 0:
+            line_length = 1.0
+        
+        x, y = x0, y0
+        step_count = 0
+        
+        while True:
+            if region_id_data[y, x] == region_id:
+                t = step_count / line_length
+                local_thickness = max(1, int(thicknesses[i] * (1.0 - 0.5 * (2*t - 1)**2)))
+                
+                half_t = local_thickness // 2
+                for py in range(max(0, y - half_t), min(resolution - 1, y + half_t) + 1):
+                    for px in range(max(0, x - half_t), min(resolution - 1, x + half_t) + 1):
+                        if region_id_data[py, px] == region_id:
+                            for c in range(3):
+                                image_array[py, px, c] = (image_array[py, px, c] * (1 - opacity)
+                                                          + colors[i, c] * opacity)
+                            image_array[py, px, 3] = 1.0
+            
+            if x == x1 and y == y1:
+                break
+            
+            e2 = 2 * err
+            if e2 > -dy:
+                err -= dy
+                x += sx
+            if e2 < dx:
+                err += dx
+                y += sy
             
-        step_count += 1
+            step_count += 1
 
-def get_barycentric_coords(point, triangle):
-    """Calculate barycentric coordinates of a point in a triangle"""
-    try:
-        px, py = point
-        (ax, ay), (bx, by), (cx, cy) = triangle
-        
-        # Compute vectors
-        v0x, v0y = cx - ax, cy - ay
-        v1x, v1y = bx - ax, by - ay
-        v2x, v2y = px - ax, py - ay
-        
-        # Compute dot products
-        d00 = v0x * v0x + v0y * v0y
-        d01 = v0x * v1x + v0y * v1y
-        d11 = v1x * v1x + v1y * v1y
-        d20 = v2x * v0x + v2y * v0y
-        d21 = v2x * v1x + v2y * v1y
-        
-        # Compute barycentric coordinates
-        denom = d00 * d11 - d01 * d01
-        if abs(denom) < 0.00001:
-            return None  # Degenerate triangle
-        
-        v = (d11 * d20 - d01 * d21) / denom
-        w = (d00 * d21 - d01 * d20) / denom
-        u = 1.0 - v - w
-        
-        return (u, v, w)
-    except:
+def rasterize_triangle(tri_uvs, resolution):
+    """
+    Find the pixels a triangle at least partially covers.
+    
+    Returns (ys, xs, weights), with the barycentric weights of each pixel center
+    as an (n, 3) array, or None for a degenerate triangle.
+    """
+    (ax, ay), (bx, by), (cx, cy) = tri_uvs
+    
+    # Twice the signed area
+    area = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    if area * area < 0.00001:
+        return None  # Degenerate triangle
+    
+    # Expanded bounding box with 1px margin for the triangle
+    tri_min_x, tri_max_x = min(ax, bx, cx), max(ax, bx, cx)
+    tri_min_y, tri_max_y = min(ay, by, cy), max(ay, by, cy)
+    min_x = max(0, int(tri_min_x - 1))
+    max_x = min(resolution - 1, int(tri_max_x + 1))
+    min_y = max(0, int(tri_min_y - 1))
+    max_y = min(resolution - 1, int(tri_max_y + 1))
+    if min_x > max_x or min_y > max_y:
         return None
+    
+    xs = np.arange(min_x, max_x + 1, dtype=np.float64)[None, :]
+    ys = np.arange(min_y, max_y + 1, dtype=np.float64)[:, None]
+    
+    # Barycentric weights are linear edge functions scaled by the area; the weight of
+    # each vertex is 1 there and 0 along the opposite edge
+    wa_dx, wa_dy = -(cy - by) / area, (cx - bx) / area
+    wb_dx, wb_dy = -(ay - cy) / area, (ax - cx) / area
+    wa = (xs - bx) * wa_dx + (ys - by) * wa_dy
+    wb = (xs - cx) * wb_dx + (ys - cy) * wb_dy
+    wc = 1.0 - wa - wb
+    wc_dx, wc_dy = -wa_dx - wb_dx, -wa_dy - wb_dy
+    
+    # A pixel overlaps the triangle if, for every edge, some point of the pixel square
+    # is on the inner side, and the pixel square overlaps the triangle's bounds
+    inside = ((wa + 0.5 * (abs(wa_dx) + abs(wa_dy)) >= 0)
+              & (wb + 0.5 * (abs(wb_dx) + abs(wb_dy)) >= 0)
+              & (wc + 0.5 * (abs(wc_dx) + abs(wc_dy)) >= 0)
+              & (xs + 0.5 >= tri_min_x) & (xs - 0.5 <= tri_max_x)
+              & (ys + 0.5 >= tri_min_y) & (ys - 0.5 <= tri_max_y))
+    
+    pixel_ys, pixel_xs = np.nonzero(inside)
+    weights = np.stack((wa[pixel_ys, pixel_xs], wb[pixel_ys, pixel_xs], wc[pixel_ys, pixel_xs]), axis=1)
+    return pixel_ys + min_y, pixel_xs + min_x, weights
+
+@njit(cache=True)
+def dsu_find(parent, i):
+    """Find the root of i, halving the path on the way"""
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+@njit(cache=True)
+def dsu_union_pairs(parent, pairs):
+    """Union each pair, always linking the higher root under the lower one"""
+    for k in range(pairs.shape[0]):
+        root_x = dsu_find(parent, pairs[k, 0])
+        root_y = dsu_find(parent, pairs[k, 1])
+        if root_x > root_y:
+            parent[root_x] = root_y
+        elif root_y > root_x:
+            parent[root_y] = root_x
+
+@njit(cache=True)
+def dsu_resolve(parent):
+    """Point every element straight at its root"""
+    for i in range(parent.shape[0]):
+        parent[i] = dsu_find(parent, i)
+    return parent
 
-def is_point_in_triangle_float(point, triangle):
-    """Check if point is inside triangle using barycentric coordinates with float precision"""
-    uvw = get_barycentric_coords(point, triangle)
-    if uvw is None:
-        return False
-    
-    u, v, w = uvw
-    # Point is inside if all barycentric coordinates are >= 0 and sum to 1
-    return (u >= 0) and (v >= 0) and (w >= 0)
+def rasterize_triangles(tri_pixel_uvs, tri_uvs, tri_normals, tri_face_ids, tri_region_ids,
+                        tri_objects, resolution, object_ownership, normal_data, face_id_data,
+                        region_id_data, uv_data):
+    """
+    Write the face data of every pixel the triangles cover.
+    
+    Where triangles share pixels, the later triangle wins. Normals and UVs are
+    quantized to the fixed-point formats of PIXEL_ATTR_DTYPE as they are stored.
+    """
+    tri_normals = np.round(tri_normals * NORMAL_SCALE).astype(np.int16)
+    
+    if not HAVE_NUMBA:
+        for t in range(len(tri_pixel_uvs)):
+            covered = rasterize_triangle(tri_pixel_uvs[t], resolution)
+            if covered is None:
+                continue
+            ys, xs, weights = covered
+            
+            # Store data for the covered pixels, with UVs interpolated at the pixel centers
+            object_ownership[ys, xs] = tri_objects[t]
+            normal_data[ys, xs] = tri_normals[t]
+            face_id_data[ys, xs] = tri_face_ids[t]
+            region_id_data[ys, xs] = tri_region_ids[t]
+            uv_data[ys, xs] = np.round(np.clip(weights @ tri_uvs[t], 0.0, 1.0) * UV_SCALE)
+        return
+    
+    # Bin the triangles into square tiles; each tile is rasterized by one thread,
+    # visiting its triangles in order so the later triangle still wins
+    tile_size = 32
+    tiles_per_row = (resolution + tile_size - 1) // tile_size
+    corner_a, corner_b, corner_c = tri_pixel_uvs[:, 0], tri_pixel_uvs[:, 1], tri_pixel_uvs[:, 2]
+    min_corners = np.minimum(np.minimum(corner_a, corner_b), corner_c)
+    max_corners = np.maximum(np.maximum(corner_a, corner_b), corner_c)
+    min_tiles = np.clip(min_corners - 1, 0, resolution - 1).astype(np.int64) // tile_size
+    max_tiles = np.clip(max_corners + 1, 0, resolution - 1).astype(np.int64) // tile_size
+    first_tile_x = min_tiles[:, 0]
+    first_tile_y = min_tiles[:, 1]
+    tiles_x = max_tiles[:, 0] - first_tile_x + 1
+    tile_counts = tiles_x * (max_tiles[:, 1] - first_tile_y + 1)
+    tile_tris = np.repeat(np.arange(len(tri_pixel_uvs)), tile_counts)
+    within = np.arange(len(tile_tris)) - np.repeat(np.cumsum(tile_counts) - tile_counts, tile_counts)
+    tiles_x = np.repeat(tiles_x, tile_counts)
+    tile_x = np.repeat(first_tile_x, tile_counts) + within % tiles_x
+    tile_y = np.repeat(first_tile_y, tile_counts) + within // tiles_x
+    
+    # Number the tiles along a Z-order curve, so neighbouring tiles stay close in memory
+    # and the triangles of neighbouring tiles are close in the work list
+    tile_codes = morton_codes(tile_x, tile_y)
+    if tiles_per_row <= 256:
+        # Codes fit in 16 bits, where NumPy's stable sort is a radix sort
+        order = np.argsort(tile_codes.astype(np.uint16), kind='stable')
+    else:
+        order = np.argsort(tile_codes, kind='stable')
+    tile_tris = tile_tris[order]
+    all_tiles = np.arange(tiles_per_row)
+    grid_codes = np.sort(morton_codes(np.tile(all_tiles, tiles_per_row), np.repeat(all_tiles, tiles_per_row)))
+    tile_starts = np.searchsorted(tile_codes[order], grid_codes)
+    tile_starts = np.append(tile_starts, len(tile_tris))
+    
+    _rasterize_tiles(
+        tri_pixel_uvs, tri_uvs, tri_normals, tri_face_ids, tri_region_ids,
+        tile_starts, tile_tris, grid_codes, tile_size, tri_objects,
+        object_ownership, normal_data, face_id_data, region_id_data, uv_data
+    )
+
+def morton_codes(xs, ys):
+    """Interleave the bits of 16-bit x and y coordinates into Z-order curve indices"""
+    codes = np.zeros(np.shape(xs), dtype=np.int64)
+    for shift, v in ((0, np.asarray(xs, dtype=np.int64)), (1, np.asarray(ys, dtype=np.int64))):
+        v = v & 0x0000FFFF
+        v = (v | (v << 8)) & 0x00FF00FF
+        v = (v | (v << 4)) & 0x0F0F0F0F
+        v = (v | (v << 2)) & 0x33333333
+        v = (v | (v << 1)) & 0x55555555
+        codes |= v << shift
+    return codes
+
+@njit(cache=True)
+def morton_decode(code):
+    """Split a Z-order curve index back into its x and y coordinates"""
+    x = 0
+    y = 0
+    for bit in range(16):
+        x |= ((code >> (2 * bit)) & 1) << bit
+        y |= ((code >> (2 * bit + 1)) & 1) << bit
+    return x, y
 
-def lines_intersect(p1, p2, p3, p4):
-    """Check if line segments (p1,p2) and (p3,p4) intersect"""
-    x1, y1 = p1
-    x2, y2 = p2
-    x3, y3 = p3
-    x4, y4 = p4
-    
-    # Calculate the direction vectors
-    dx1 = x2 - x1
-    dy1 = y2 - y1
-    dx2 = x4 - x3
-    dy2 = y4 - y3
-    
-    # Calculate the determinant
-    d = dx1 * dy2 - dy1 * dx2
-    
-    # Lines are parallel if determinant is zero
-    if abs(d) < 0.00001:
-        return False
-    
-    # Calculate parameters for the intersection point
-    s = ((x1 - x3) * dy2 - (y1 - y3) * dx2) / d
-    t = ((x3 - x1) * dy1 - (y3 - y1) * dx1) / -d
-    
-    # Check if the intersection is within both line segments
-    return (0 <= s <= 1) and (0 <= t <= 1)
\ No newline at end of file
+@njit(parallel=True, fastmath=True, cache=True)
+def _rasterize_tiles(tri_pixel_uvs, tri_uvs, tri_normals, tri_face_ids, tri_region_ids,
+                     tile_starts, tile_tris, tile_codes, tile_size, tri_objects,
+                     object_ownership, normal_data, face_id_data, region_id_data, uv_data):
+    """Scalar version of rasterize_triangle, run over square tiles in parallel"""
+    resolution = object_ownership.shape[0]
+    
+    for tile in prange(len(tile_codes)):
+        tile_x, tile_y = morton_decode(tile_codes[tile])
+        tile_min_x = tile_x * tile_size
+        tile_max_x = min(tile_min_x + tile_size, resolution) - 1
+        tile_min_y = tile_y * tile_size
+        tile_max_y = min(tile_min_y + tile_size, resolution) - 1
+        
+        for k in range(tile_starts[tile], tile_starts[tile + 1]):
+            t = tile_tris[k]
+            ax, ay = tri_pixel_uvs[t, 0, 0], tri_pixel_uvs[t, 0, 1]
+            bx, by = tri_pixel_uvs[t, 1, 0], tri_pixel_uvs[t, 1, 1]
+            cx, cy = tri_pixel_uvs[t, 2, 0], tri_pixel_uvs[t, 2, 1]
+            
+            # Twice the signed area
+            area = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+            if area * area < 0.00001:
+                continue  # Degenerate triangle
+            
+            # Pixels whose squares overlap the triangle's bounds, within this tile
+            tri_min_x, tri_max_x = min(ax, bx, cx), max(ax, bx, cx)
+            tri_min_y, tri_max_y = min(ay, by, cy), max(ay, by, cy)
+            min_x = max(tile_min_x, int(tri_min_x - 1), int(math.ceil(tri_min_x - 0.5)))
+            max_x = min(tile_max_x, int(tri_max_x + 1), int(math.floor(tri_max_x + 0.5)))
+            min_y = max(tile_min_y, int(tri_min_y - 1), int(math.ceil(tri_min_y - 0.5)))
+            max_y = min(tile_max_y, int(tri_max_y + 1), int(math.floor(tri_max_y + 0.5)))
+            
+            # Barycentric weight gradients, and how far each weight can grow within a pixel
+            wa_dx, wa_dy = -(cy - by) / area, (cx - bx) / area
+            wb_dx, wb_dy = -(ay - cy) / area, (ax - cx) / area
+            wc_dx, wc_dy = -wa_dx - wb_dx, -wa_dy - wb_dy
+            reach_a = 0.5 * (abs(wa_dx) + abs(wa_dy))
+            reach_b = 0.5 * (abs(wb_dx) + abs(wb_dy))
+            reach_c = 0.5 * (abs(wc_dx) + abs(wc_dy))
+            
+            # Weights at the first pixel of the first row, stepped incrementally from there
+            row_wa = (min_x - bx) * wa_dx + (min_y - by) * wa_dy
+            row_wb = (min_x - cx) * wb_dx + (min_y - cy) * wb_dy
+            
+            for y in range(min_y, max_y + 1):
+                wa = row_wa
+                wb = row_wb
+                for x in range(min_x, max_x + 1):
+                    wc = 1.0 - wa - wb
+                    
+                    # The pixel is covered when no edge test is negative; taking the
+                    # minimum tests all three edges with a single branch
+                    if min(wa + reach_a, wb + reach_b, wc + reach_c) >= 0:
+                        object_ownership[y, x] = tri_objects[t]
+                        for c in range(3):
+                            normal_data[y, x, c] = tri_normals[t, c]
+                        face_id_data[y, x] = tri_face_ids[t]
+                        region_id_data[y, x] = tri_region_ids[t]
+                        for c in range(2):
+                            uv = wa * tri_uvs[t, 0, c] + wb * tri_uvs[t, 1, c] + wc * tri_uvs[t, 2, c]
+                            uv_data[y, x, c] = int(min(max(uv, 0.0), 1.0) * UV_SCALE + 0.5)
+                    
+                    wa += wa_dx
+                    wb += wb_dx
+                
+                row_wa += wa_dy
+                row_wb += wb_dy
@@ -1,7 +1,42 @@
 import bpy
 from bpy.props import FloatProperty, FloatVectorProperty
 
+def get_stroke_width(self):
+    return self.stroke_width_internal
+
+def set_stroke_width(self, value):
+    self.stroke_width_internal = (value[0], max(value[0], value[1]))
+
+def get_stroke_length(self):
+    return self.stroke_length_internal
+
+def set_stroke_length(self, value):
+    self.stroke_length_internal = (value[0], max(value[0], value[1]))
+
+def get_normal_angle_threshold(self):
+    return self.normal_angle_internal
+
+def set_normal_angle_threshold(self, value):
+    self.normal_angle_internal = min(180.0, max(0.0, float(value)))
+
 class PainterlyEffectProperties(bpy.types.PropertyGroup):
+    # Internal min/max storage; the exposed properties below keep min <= max on write
+    stroke_width_internal: FloatVectorProperty(
+        name="Internal Stroke Width",
+        default=(8.0, 15.0),
+        min=1.0,
+        max=30.0,
+        size=2,
+    )
+    
+    stroke_length_internal: FloatVectorProperty(
+        name="Internal Stroke Length",
+        default=(20.0, 40.0),
+        min=1.0,
+        max=100.0,
+        size=2,
+    )
+    
     stroke_width: FloatVectorProperty(
         name="Stroke Width",
         description="Min and max stroke width",
@@ -10,6 +45,8 @@ class PainterlyEffectProperties(bpy.types.PropertyGroup):
         max=30.0,
         size=2,
         subtype='NONE',
+        get=get_stroke_width,
+        set=set_stroke_width,
     )
     
     stroke_length: FloatVectorProperty(
@@ -20,6 +57,8 @@ class PainterlyEffectProperties(bpy.types.PropertyGroup):
         max=100.0,
         size=2,
         subtype='NONE',
+        get=get_stroke_length,
+        set=set_stroke_length,
     )
     
     # Internal property without underscore
@@ -39,9 +78,8 @@ class PainterlyEffectProperties(bpy.types.PropertyGroup):
         max=180.0,
         precision=1,
         subtype='NONE',  # Don't use 'ANGLE' subtype
-        get=lambda self: self.normal_angle_internal,
-        set=lambda self, value: setattr(self, "normal_angle_internal", 
-                                       min(180.0, max(0.0, float(value))))
+        get=get_normal_angle_threshold,
+        set=set_normal_angle_threshold,
     )
     
     color_variation: FloatProperty(
@@ -53,20 +91,6 @@ class PainterlyEffectProperties(bpy.types.PropertyGroup):
         subtype='FACTOR',
     )
 
-    def update_min_max(self, context):
-        """Ensure min <= max for range properties"""
-        # Stroke width
-        if self.stroke_width[0] > self.stroke_width[1]:
-            self.stroke_width[1] = self.stroke_width[0]
-            
-        # Stroke length
-        if self.stroke_length[0] > self.stroke_length[1]:
-            self.stroke_length[1] = self.stroke_length[0]
-        
-        # Force normal angle to be in valid range
-        if self.normal_angle_internal > 180.0 or self.normal_angle_internal < 0.0:
-            self.normal_angle_internal = 10.0
-
     # Reset function for normal angle threshold
     def reset_normal_angle_threshold(self):
         self.normal_angle_internal = 10.0
@@ -13,32 +13,19 @@ class PAINTERLY_PT_main_panel(Panel):
         scene = context.scene
         props = scene.painterly_props
         
-        # Update min/max constraints
-        props.update_min_max(context)
-        
         # Stroke Width
         box = layout.box()
         box.label(text="Stroke Width:")
-        row = box.row()
-        split = row.split(factor=0.5)
-        col1 = split.column()
-        col2 = split.column()
-        col1.label(text="Min:")
-        col1.prop(props, "stroke_width", index=0, text="")
-        col2.label(text="Max:")
-        col2.prop(props, "stroke_width", index=1, text="")
+        row = box.row(align=True)
+        row.prop(props, "stroke_width", index=0, text="Min")
+        row.prop(props, "stroke_width", index=1, text="Max")
         
         # Stroke Length
         box = layout.box()
         box.label(text="Stroke Length:")
-        row = box.row()
-        split = row.split(factor=0.5)
-        col1 = split.column()
-        col2 = split.column()
-        col1.label(text="Min:")
-        col1.prop(props, "stroke_length", index=0, text="")
-        col2.label(text="Max:")
-        col2.prop(props, "stroke_length", index=1, text="")
+        row = box.row(align=True)
+        row.prop(props, "stroke_length", index=0, text="Min")
+        row.prop(props, "stroke_length", index=1, text="Max")
         
         # Normal Angle Threshold with reset button
         box = layout.box()
@@ -1,23 +1,55 @@
 import cv2
 import numpy as np
-import random
-import tqdm
+import math
+from numba import njit, prange
 
-def apply_brush_strokes(texture_path, normal_path, stroke_size=30, edge_noise=5, angle_variation=20, sparsity=0.0001):
-    def random_angle():
-        return random.uniform(-angle_variation, angle_variation)
+@njit(nogil=True, fastmath=True, cache=True)
+def _rasterize(result_t, result_n, x, y, c, s, half_w, half_l, col_t, col_n):
+    """Paint one stroke rotated by (c, s) = (cos, sin) of its angle and centered on (x, y)"""
+    h, w = result_t.shape[:2]
+    
+    # Exact bounding box of the rotated rectangle, clipped to the image
+    extent_x = int(abs(c) * half_w + abs(s) * half_l)
+    extent_y = int(abs(s) * half_w + abs(c) * half_l)
+    x0, y0 = max(0, x - extent_x), max(0, y - extent_y)
+    x1, y1 = min(w, x + extent_x + 1), min(h, y + extent_y + 1)
+    
+    # A pixel is inside the stroke if, rotated back by the stroke angle,
+    # it lies within the half-width and half-length of the rectangle
+    for py in range(y0, y1):
+        dy = py - y
+        u_row = -s * dy
+        v_row = c * dy
+        for px in range(x0, x1):
+            dx = px - x
+            u = u_row + c * dx
+            v = v_row + s * dx
+            if abs(u) <= half_w and abs(v) <= half_l:
+                for ch in range(3):
+                    result_t[py, px, ch] = col_t[ch]
+                    result_n[py, px, ch] = col_n[ch]
 
-    def add_noise(size):
-        return size + random.uniform(-edge_noise, edge_noise)
+@njit(parallel=True, fastmath=True, cache=True)
+def _apply(texture, normal, result_t, result_n, xs, ys, angles, widths, lengths):
+    """Paint rotated rectangular strokes colored from each stroke's center pixel"""
+    for i in prange(xs.shape[0]):
+        x = xs[i]
+        y = ys[i]
+        theta = math.radians(angles[i])
+        _rasterize(result_t, result_n, x, y, math.cos(theta), math.sin(theta),
+                   widths[i] // 2, lengths[i] // 2, texture[y, x], normal[y, x])
+
+def apply_brush_strokes(texture_path, normal_path, stroke_size=30, edge_noise=5, angle_variation=20, sparsity=0.0001):
+    rng = np.random.default_rng()
 
     # Read the images
     texture = cv2.imread(texture_path)
     normal = cv2.imread(normal_path)
     h, w, _ = texture.shape
 
-    # Create a canvas to draw the brush strokes
-    texture_canvas = np.zeros_like(texture)
-    normal_canvas = np.zeros_like(normal)
+    # Draw the brush strokes directly onto copies of the original images
+    texture_result = texture.copy()
+    normal_result = normal.copy()
 
     # Convert image to HSV to mask out black parts
     hsv_image = cv2.cvtColor(texture, cv2.COLOR_BGR2HSV)
@@ -29,60 +61,38 @@ def apply_brush_strokes(texture_path, normal_path, stroke_size=30, edge_noise=5,
     # Random sampling points in the image based on sparsity
     non_zero_indices = np.argwhere(mask == 255)
     print(f"Total non-zero points: {len(non_zero_indices)}")
-    selected_points = random.sample(list(non_zero_indices), max(1, int(sparsity * len(non_zero_indices))))
+    num_selected = max(1, int(sparsity * len(non_zero_indices)))
+    selected_points = non_zero_indices[rng.choice(len(non_zero_indices), num_selected, replace=False)]
     print(f"Selected {len(selected_points)} points")
 
-    # Create a combined mask to track all brush strokes
-    all_texture_strokes_mask = np.zeros((h, w), dtype=np.uint8)
-    all_normal_strokes_mask = np.zeros((h, w), dtype=np.uint8)
+    # Skip points in 16x16 tiles that are mostly background; strokes started there
+    # would mostly paint over black
+    valid_tile = 16
+    valid_integral = cv2.integral(mask // 255)
+    y0 = selected_points[:, 0] // valid_tile * valid_tile
+    x0 = selected_points[:, 1] // valid_tile * valid_tile
+    y1 = np.minimum(y0 + valid_tile, mask.shape[0])
+    x1 = np.minimum(x0 + valid_tile, mask.shape[1])
+    valid_count = (valid_integral[y1, x1] - valid_integral[y0, x1]
+                   - valid_integral[y1, x0] + valid_integral[y0, x0])
+    selected_points = selected_points[2 * valid_count >= (y1 - y0) * (x1 - x0)]
+    print(f"Kept {len(selected_points)} points on mostly colored tiles")
 
-    for point in tqdm.tqdm(selected_points):
-        y, x = point
-        # print(f"Processing point: ({x}, {y})")
-        angle = random_angle()
+    # Sort points by the 128x128 tile they fall in, so consecutive strokes (and each
+    # thread's share of them) keep writing to the same cache-resident part of the image
+    tile_size = 128
+    tiles_y, tiles_x = selected_points[:, 0] // tile_size, selected_points[:, 1] // tile_size
+    selected_points = selected_points[np.lexsort((tiles_x, tiles_y))]
 
-        # Define brush stroke rectangle
-        length = add_noise(stroke_size)
-        width = add_noise(stroke_size // 2)
-        
-        # Create an empty mask
-        brush_stroke = np.zeros((h, w), dtype=np.uint8)
-        
-        # Draw brush stroke on the mask
-        cv2.rectangle(
-            brush_stroke,
-            (int(x - width // 2), int(y - length // 2)),
-            (int(x + width // 2), int(y + length // 2)),
-            255,
-            -1
-        )
-        
-        # Rotate brush stroke
-        M = cv2.getRotationMatrix2D((float(x), float(y)), angle, 1.0)
-        brush_stroke = cv2.warpAffine(brush_stroke, M, (w, h))
+    # Random angle and noisy brush stroke rectangle size for every point
+    num_points = len(selected_points)
+    angles = rng.uniform(-angle_variation, angle_variation, num_points)
+    lengths = stroke_size + rng.uniform(-edge_noise, edge_noise, num_points)
+    widths = stroke_size // 2 + rng.uniform(-edge_noise, edge_noise, num_points)
 
-        # Extract color from original image
-        texture_color = texture[y, x]
-        normal_color = normal[y, x]
-        
-        # Apply brush stroke with extracted color
-        # Handle each color channel separately
-        for c in range(3):  # BGR channels
-            texture_canvas[:, :, c] = np.where(brush_stroke == 255, texture_color[c], texture_canvas[:, :, c])
-            normal_canvas[:, :, c] = np.where(brush_stroke == 255, normal_color[c], normal_canvas[:, :, c])
-        
-        # Add to the combined mask
-        all_texture_strokes_mask = np.maximum(all_texture_strokes_mask, brush_stroke)
-        all_normal_strokes_mask = np.maximum(all_normal_strokes_mask, brush_stroke)
-    
-    # Create final image by combining original image and brush strokes
-    # Only replace pixels where brush strokes were applied
-    texture_result = texture.copy()
-    normal_result = normal.copy()
-    texture_brush_mask = all_texture_strokes_mask == 255
-    normal_brush_mask = all_normal_strokes_mask == 255
-    texture_result[texture_brush_mask] = texture_canvas[texture_brush_mask]
-    normal_result[normal_brush_mask] = normal_canvas[normal_brush_mask]
+    # Paint all strokes in parallel; where strokes overlap, any one of them may end on top
+    _apply(texture, normal, texture_result, normal_result,
+           selected_points[:, 1], selected_points[:, 0], angles, widths, lengths)
     
     return texture_result, normal_result
 
@@ -1,9 +1,55 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from PIL import Image, ImageDraw
-import random
+from PIL import Image
+import cv2
 import math
 import os
+from numba import njit, prange
+
+def make_stroke_template(stroke_width, stroke_length, rotation_rad):
+    """
+    Rasterize a single stroke into a boolean mask.
+    
+    Returns:
+        (mask, origin_x, origin_y): the stroke mask and the position of the
+        stroke's starting point within it
+    """
+    dx = stroke_length * math.cos(rotation_rad)
+    dy = stroke_length * math.sin(rotation_rad)
+    
+    # Leave room for the stroke width around both end points
+    pad = stroke_width + 1
+    origin_x = pad + math.ceil(max(0.0, -dx))
+    origin_y = pad + math.ceil(max(0.0, -dy))
+    size = (origin_x + math.ceil(max(0.0, dx)) + pad + 1,
+            origin_y + math.ceil(max(0.0, dy)) + pad + 1)
+    
+    # Anti-aliased line with 4 fractional bits so the end point keeps subpixel precision
+    template = np.zeros((size[1], size[0]), dtype=np.uint8)
+    scale = 1 << 4
+    cv2.line(template, (origin_x * scale, origin_y * scale),
+             (round((origin_x + dx) * scale), round((origin_y + dy) * scale)),
+             255, stroke_width, cv2.LINE_AA, 4)
+    
+    # Keep the pixels the line covers at least half of
+    return template >= 128, origin_x, origin_y
+
+@njit(parallel=True, cache=True)
+def stamp_strokes(source, out, offsets_x, offsets_y, xs, ys):
+    """Stamp the stroke pixels at each start point, colored from the source pixel there"""
+    height, width, channels = source.shape
+    
+    # Strokes are stamped in parallel; where they overlap, any one of them may end on top
+    for i in prange(xs.shape[0]):
+        x = xs[i]
+        y = ys[i]
+        
+        for j in range(offsets_x.shape[0]):
+            px = x + offsets_x[j]
+            py = y + offsets_y[j]
+            if 0 <= px < width and 0 <= py < height:
+                for c in range(channels):
+                    out[py, px, c] = source[y, x, c]
 
 def apply_brush_strokes_inplace(texture_path, normal_path, num_strokes=1000, 
                                stroke_width=5, stroke_length=20, rotation_degrees=45,
@@ -30,7 +76,7 @@ def apply_brush_strokes_inplace(texture_path, normal_path, num_strokes=1000,
         base, ext = os.path.splitext(normal_path)
         normal_output = f"{base}_painted{ext}"
     
-    # Load the images - we'll modify these directly
+    # Load the images
     texture_img = Image.open(texture_path).convert("RGBA")
     normal_img = Image.open(normal_path).convert("RGBA")
     
@@ -40,33 +86,30 @@ def apply_brush_strokes_inplace(texture_path, normal_path, num_strokes=1000,
     
     width, height = texture_img.size
     
-    # Create drawing objects to draw directly on the images
-    texture_draw = ImageDraw.Draw(texture_img)
-    normal_draw = ImageDraw.Draw(normal_img)
-    
     # Convert rotation to radians
     rotation_rad = math.radians(rotation_degrees)
     
-    # Generate stroke parameters once and apply to both images
-    for _ in range(num_strokes):
-        # Random starting point
-        x = random.randint(0, width - 1)
-        y = random.randint(0, height - 1)
-        
-        # Calculate end point based on length and rotation
-        end_x = x + stroke_length * math.cos(rotation_rad)
-        end_y = y + stroke_length * math.sin(rotation_rad)
-        
-        # Get colors from both images at the starting point
-        try:
-            texture_color = texture_img.getpixel((x, y))
-            normal_color = normal_img.getpixel((x, y))
-            
-            # Draw on both images
-            texture_draw.line([(x, y), (end_x, end_y)], fill=texture_color, width=stroke_width)
-            normal_draw.line([(x, y), (end_x, end_y)], fill=normal_color, width=stroke_width)
-        except IndexError:
-            continue
+    # Both images stacked into one HxWx8 array, so each stroke pixel is a single
+    # 8-channel write, and a copy of it to paint on
+    fused = np.concatenate([np.asarray(texture_img), np.asarray(normal_img)], axis=2)
+    fused_out = fused.copy()
+    
+    # Every stroke has the same shape, so rasterize it once and stamp it at each start point
+    stroke_mask, origin_x, origin_y = make_stroke_template(stroke_width, stroke_length, rotation_rad)
+    mask_ys, mask_xs = np.nonzero(stroke_mask)
+    offsets_x = mask_xs - origin_x
+    offsets_y = mask_ys - origin_y
+    
+    # Random starting points for all strokes
+    rng = np.random.default_rng()
+    xs = rng.integers(0, width, num_strokes, dtype=np.int32)
+    ys = rng.integers(0, height, num_strokes, dtype=np.int32)
+    
+    # Apply identical strokes to both images in one pass
+    stamp_strokes(fused, fused_out, offsets_x, offsets_y, xs, ys)
+    
+    texture_img = Image.fromarray(np.ascontiguousarray(fused_out[:, :, :4]))
+    normal_img = Image.fromarray(np.ascontiguousarray(fused_out[:, :, 4:]))
     
     # Save the results
     texture_img.save(texture_output)
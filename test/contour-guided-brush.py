@@ -1,10 +1,10 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from PIL import Image, ImageDraw
+from PIL import Image
 import cv2
-import random
 import math
 import os
+from numba import njit
 
 def generate_contour_mask(normal_map, bands=10, hsv_channel=0, smoothing=5):
     """
@@ -32,38 +32,112 @@ def generate_contour_mask(normal_map, bands=10, hsv_channel=0, smoothing=5):
     
     # Get dimensions
     height, width = normal_img.shape[:2]
-    contour_map = np.zeros((height, width), dtype=np.uint8)
     
     # Convert to HSV color space
     hsv = cv2.cvtColor(normal_img, cv2.COLOR_RGB2HSV)
     
     # Choose HSV component
-    component = hsv[:, :, hsv_channel].copy().astype(np.float32)
+    component = hsv[:, :, hsv_channel].astype(np.float32)
     
     # Apply smoothing
     if smoothing > 0:
         component = cv2.GaussianBlur(component, (smoothing, smoothing), 0)
     
-    # Create band thresholds
+    # Bands are evenly spaced, so each pixel's band follows from one scale and round
     min_val = np.min(component)
     max_val = np.max(component)
-    step = (max_val - min_val) / bands
+    band_size = (max_val - min_val) / bands
+    if band_size > 0:
+        labels = np.ceil((component - min_val) / band_size) - 1
+        np.clip(labels, 0, bands - 1, out=labels)
+        labels = labels.astype(np.uint8)
+    else:
+        labels = np.zeros((height, width), dtype=np.uint8)
     
-    # Generate contours at each threshold level
-    for i in range(1, bands):
-        threshold = min_val + i * step
-        binary = (component > threshold).astype(np.uint8) * 255
-        
-        # Find edges of each band
-        edges = cv2.Canny(binary, 50, 150)
-        contour_map = cv2.bitwise_or(contour_map, edges)
+    # Contours are where neighboring labels differ
+    edges = np.zeros((height, width), dtype=bool)
+    edges[1:, :] |= labels[1:, :] != labels[:-1, :]
+    edges[:, 1:] |= labels[:, 1:] != labels[:, :-1]
+    contour_map = edges.astype(np.uint8) * 255
     
     # Optional: Clean up the contours and make them thicker for better detection
     kernel = np.ones((3, 3), np.uint8)
-    contour_map = cv2.dilate(contour_map, kernel, iterations=1)
+    contour_map = cv2.morphologyEx(contour_map, cv2.MORPH_DILATE, kernel)
     
     return contour_map
 
+@njit("Tuple((boolean, int64, int64))(uint8[:, ::1], int64, int64, float64, float64)",
+      cache=True, boundscheck=False)
+def find_first_contour_hit(padded_mask, x, y, end_x, end_y):
+    """
+    Walk from (x, y) towards (end_x, end_y) and stop at the first contour pixel.
+    
+    Args:
+        padded_mask: Contour mask with a 1-pixel border of contour pixels, so
+            samples that leave the image also stop the walk
+    
+    Returns:
+        (hit, last_x, last_y): whether a contour was hit, and the last sample
+        before it (only meaningful when hit is True)
+    """
+    # DDA: step at most one pixel along each axis per sample
+    num_steps = max(1, math.ceil(max(abs(end_x - x), abs(end_y - y))))
+    step_x = (end_x - x) / num_steps
+    step_y = (end_y - y) / num_steps
+    
+    last_x, last_y = x, y
+    current_x, current_y = float(x), float(y)
+    
+    for _ in range(num_steps + 1):
+        sample_x = int(current_x)
+        sample_y = int(current_y)
+        
+        # Check if this point is on a contour (or off the image)
+        if padded_mask[sample_y + 1, sample_x + 1] > 0:
+            return True, last_x, last_y
+        
+        last_x, last_y = sample_x, sample_y
+        current_x += step_x
+        current_y += step_y
+    
+    return False, last_x, last_y
+
+@njit(cache=True, boundscheck=False)
+def draw_stroke(texture_out, normal_out, x0, y0, x1, y1, texture_color, normal_color, stroke_width):
+    """
+    Draw a flat-ended line of the given width into both images at once.
+    
+    Colors are uint8 pixel rows taken straight from the source arrays.
+    """
+    height, width = texture_out.shape[:2]
+    channels = texture_out.shape[2]
+    half_w = stroke_width / 2
+    dx = x1 - x0
+    dy = y1 - y0
+    length = math.sqrt(dx * dx + dy * dy)
+    
+    # A zero-length line paints just its start pixel, like PIL does
+    if length == 0:
+        if 0 <= x0 < width and 0 <= y0 < height:
+            for c in range(channels):
+                texture_out[y0, x0, c] = texture_color[c]
+                normal_out[y0, x0, c] = normal_color[c]
+        return
+    
+    min_x = max(0, int(math.floor(min(x0, x1) - half_w)))
+    max_x = min(width - 1, int(math.ceil(max(x0, x1) + half_w)))
+    min_y = max(0, int(math.floor(min(y0, y1) - half_w)))
+    max_y = min(height - 1, int(math.ceil(max(y0, y1) + half_w)))
+    
+    for py in range(min_y, max_y + 1):
+        for px in range(min_x, max_x + 1):
+            along = ((px - x0) * dx + (py - y0) * dy) / length
+            across = ((px - x0) * dy - (py - y0) * dx) / length
+            if 0 <= along <= length and abs(across) <= half_w:
+                for c in range(channels):
+                    texture_out[py, px, c] = texture_color[c]
+                    normal_out[py, px, c] = normal_color[c]
+
 def apply_contour_guided_brush_strokes(texture_path, normal_path, contour_bands=10, 
                                       num_strokes=1000, stroke_width=5, stroke_length=20, 
                                       rotation_degrees=45, hsv_channel=0,
@@ -106,12 +180,11 @@ def apply_contour_guided_brush_strokes(texture_path, normal_path, contour_bands=
     normal_np = np.array(normal_img)
     contour_mask = generate_contour_mask(normal_np, bands=contour_bands, hsv_channel=hsv_channel)
     
-    # Create PIL-compatible mask
-    contour_mask_pil = Image.fromarray(contour_mask)
+    # Border the mask with contour pixels so the stroke walk needs no bounds checks
+    padded_mask = np.ascontiguousarray(np.pad(contour_mask, 1, constant_values=255))
     
-    # Create drawing objects
-    texture_draw = ImageDraw.Draw(texture_img)
-    normal_draw = ImageDraw.Draw(normal_img)
+    # Integral image of the contour mask for constant-time bounding box sums
+    contour_integral = cv2.integral(contour_mask, sdepth=cv2.CV_64F)
     
     # Convert rotation to radians
     rotation_rad = math.radians(rotation_degrees)
@@ -120,12 +193,21 @@ def apply_contour_guided_brush_strokes(texture_path, normal_path, contour_bands=
     total_strokes = 0
     broken_strokes = 0
     
+    # Pixel arrays of the source images for color lookups
+    texture_arr = np.asarray(texture_img)
+    normal_arr = np.asarray(normal_img)
+    
+    # Strokes are drawn into copies; the source arrays stay untouched for color lookups
+    texture_out = texture_arr.copy()
+    normal_out = normal_arr.copy()
+    
+    # Random starting points for all strokes
+    rng = np.random.default_rng()
+    xs = rng.integers(0, width, num_strokes, dtype=np.int32)
+    ys = rng.integers(0, height, num_strokes, dtype=np.int32)
+    
     # Apply strokes
-    for _ in range(num_strokes):
-        # Random starting point
-        x = random.randint(0, width - 1)
-        y = random.randint(0, height - 1)
-        
+    for x, y in zip(xs.tolist(), ys.tolist()):
         # Calculate end point based on length and rotation
         end_x = x + stroke_length * math.cos(rotation_rad)
         end_y = y + stroke_length * math.sin(rotation_rad)
@@ -134,46 +216,34 @@ def apply_contour_guided_brush_strokes(texture_path, normal_path, contour_bands=
         end_x = min(max(0, end_x), width - 1)
         end_y = min(max(0, end_y), height - 1)
         
-        # Get colors from both images at the starting point
-        try:
-            texture_color = texture_img.getpixel((x, y))
-            normal_color = normal_img.getpixel((x, y))
-            
-            # Check if the stroke crosses any contour by sampling along the path
-            num_samples = max(int(stroke_length), 2)
-            crosses_contour = False
-            
-            # Previous valid point
-            last_valid_x, last_valid_y = x, y
-            
-            # Sample points along the line
-            for t in np.linspace(0, 1, num_samples):
-                sample_x = int(x + t * (end_x - x))
-                sample_y = int(y + t * (end_y - y))
-                
-                # Ensure sample point is within bounds
-                if 0 <= sample_x < width and 0 <= sample_y < height:
-                    # Check if this point is on a contour
-                    if contour_mask[sample_y, sample_x] > 0:
-                        crosses_contour = True
-                        end_x = last_valid_x
-                        end_y = last_valid_y
-                        broken_strokes += 1
-                        break
-                    
-                    last_valid_x, last_valid_y = sample_x, sample_y
-            
-            # Draw the stroke up to the contour or the full length if no crossing
-            texture_draw.line([(x, y), (end_x, end_y)], fill=texture_color, width=stroke_width)
-            normal_draw.line([(x, y), (end_x, end_y)], fill=normal_color, width=stroke_width)
-            total_strokes += 1
-            
-        except (IndexError, ValueError):
-            continue
+        # Strokes whose bounding box holds no contour pixels can't cross one
+        x0, x1 = min(x, int(end_x)), max(x, int(end_x)) + 1
+        y0, y1 = min(y, int(end_y)), max(y, int(end_y)) + 1
+        bbox_sum = (contour_integral[y1, x1] - contour_integral[y0, x1]
+                    - contour_integral[y1, x0] + contour_integral[y0, x0])
+        
+        # Check if the stroke crosses any contour by sampling along the path
+        crosses_contour = False
+        if bbox_sum > 0:
+            crosses_contour, last_valid_x, last_valid_y = find_first_contour_hit(
+                padded_mask, x, y, end_x, end_y
+            )
+        
+        if crosses_contour:
+            end_x = last_valid_x
+            end_y = last_valid_y
+            broken_strokes += 1
+        
+        # Draw the stroke up to the contour or the full length if no crossing
+        draw_stroke(texture_out, normal_out, x, y, float(end_x), float(end_y),
+                    texture_arr[y, x], normal_arr[y, x], stroke_width)
+        total_strokes += 1
     
     print(f"Applied {total_strokes} strokes, {broken_strokes} were cut at contour boundaries")
     
     # Save the results
+    texture_img = Image.fromarray(texture_out)
+    normal_img = Image.fromarray(normal_out)
     texture_img.save(texture_output)
     normal_img.save(normal_output)
     
@@ -1,61 +1,8 @@
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
-
-def generate_normal_band_contours_hsv(normal_map, bands=15, hsv_channel=0, smoothing=5):
-    """
-    Generate evenly spaced contours based on a specific component of the normal map
-    using HSV color space.
-    
-    Args:
-        normal_map: RGB normal map
-        bands: Number of contour bands to generate
-        hsv_channel: Which HSV channel to use (0=Hue, 1=Saturation, 2=Value)
-        smoothing: Size of Gaussian blur kernel for smoothing
-    
-    Returns:
-        contour_map: Binary image with band contours
-    """
-    # Ensure the normal map is in the right format for conversion
-    if normal_map.dtype != np.uint8 and normal_map.max() <= 1.0:
-        normal_map_uint8 = (normal_map * 255).astype(np.uint8)
-    else:
-        normal_map_uint8 = normal_map.copy()
-    
-    # Get dimensions
-    height, width = normal_map.shape[:2]
-    contour_map = np.zeros((height, width), dtype=np.uint8)
-    
-    # Convert to HSV color space
-    hsv = cv2.cvtColor(normal_map_uint8, cv2.COLOR_RGB2HSV)
-    
-    # Choose HSV component
-    component = hsv[:, :, hsv_channel].copy().astype(np.float32)
-    
-    # Apply smoothing
-    if smoothing > 0:
-        component = cv2.GaussianBlur(component, (smoothing, smoothing), 0)
-    
-    # Create band thresholds
-    min_val = np.min(component)
-    max_val = np.max(component)
-    step = (max_val - min_val) / bands
-    
-    # Generate contours at each threshold level
-    for i in range(1, bands):
-        threshold = min_val + i * step
-        binary = (component > threshold).astype(np.uint8) * 255
-        
-        # Find edges of each band
-        edges = cv2.Canny(binary, 50, 150)
-        contour_map = cv2.bitwise_or(contour_map, edges)
-    
-    # Optional: Clean up the contours
-    # Use a horizontal kernel to preserve horizontal lines
-    kernel = np.ones((1, 3), np.uint8)
-    contour_map = cv2.morphologyEx(contour_map, cv2.MORPH_CLOSE, kernel)
-    
-    return contour_map
+from contour_core import (generate_normal_band_contours_hsv, generate_normal_band_contours_hsv_list,
+                          apply_contours_to_normal_map)
 
 def visualize_hsv_components(normal_map):
     """
@@ -65,7 +12,7 @@ def visualize_hsv_components(normal_map):
     if normal_map.dtype != np.uint8 and normal_map.max() <= 1.0:
         normal_map_uint8 = (normal_map * 255).astype(np.uint8)
     else:
-        normal_map_uint8 = normal_map.copy()
+        normal_map_uint8 = normal_map
     
     # Convert to HSV
     hsv = cv2.cvtColor(normal_map_uint8, cv2.COLOR_RGB2HSV)
@@ -97,8 +44,8 @@ def generate_hsv_contours_with_preview(normal_map, bands_list=[10, 15, 20], hsv_
     axs[0].axis('off')
     
     # Display contours with different band settings
-    for i, bands in enumerate(bands_list):
-        contour_map = generate_normal_band_contours_hsv(normal_map, bands=bands, hsv_channel=hsv_channel)
+    contour_maps = generate_normal_band_contours_hsv_list(normal_map, bands_list, hsv_channel=hsv_channel)
+    for i, (bands, contour_map) in enumerate(zip(bands_list, contour_maps)):
         axs[i + 1].imshow(contour_map, cmap='gray')
         axs[i + 1].set_title(f'{bands} Bands')
         axs[i + 1].axis('off')
@@ -106,35 +53,6 @@ def generate_hsv_contours_with_preview(normal_map, bands_list=[10, 15, 20], hsv_
     plt.tight_layout()
     plt.show()
 
-def apply_contours_to_normal_map(normal_map, contour_map, contour_color=[1, 1, 1]):
-    """
-    Overlay contours on the original normal map.
-    
-    Args:
-        normal_map: Original RGB normal map
-        contour_map: Binary image with contours
-        contour_color: RGB color for contours
-    
-    Returns:
-        result: Normal map with contours overlaid
-    """
-    # Normalize the normal map if needed
-    if normal_map.max() > 1.0:
-        normal_map = normal_map.astype(float) / 255.0
-    
-    # Create RGB contour image
-    contour_color = np.array(contour_color)
-    contour_rgb = np.zeros((*contour_map.shape, 3), dtype=np.float32)
-    for i in range(3):
-        contour_rgb[:, :, i] = contour_map / 255.0 * contour_color[i]
-    
-    # Blend normal map with contours
-    alpha = 0.7  # Opacity of the normal map
-    beta = 1.0   # Opacity of the contours
-    
-    result = cv2.addWeighted(normal_map, alpha, contour_rgb, beta, 0)
-    return result
-
 # Example usage
 if __name__ == "__main__":
     # Load normal map
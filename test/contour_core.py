@@ -0,0 +1,150 @@
+import cv2
+import numpy as np
+import math
+
+# Scratch buffers for the contour pipeline, keyed by image size. None of them is
+# returned to callers, so repeated calls (like the band preview) can share them.
+_SCRATCH = {}
+
+def _scratch_buffers(height, width):
+    return _SCRATCH.setdefault((height, width), {
+        'hsv': np.empty((height, width, 3), dtype=np.uint8),
+        'component': np.empty((height, width), dtype=np.uint8),
+        'edges': np.empty((height, width), dtype=bool),
+        'diff': np.empty((height, width - 1), dtype=bool),
+        'contour': np.empty((height, width), dtype=np.uint8),
+        'closed': np.empty((height, width), dtype=np.uint8),
+    })
+
+def _prepare_component(normal_map, hsv_channel=0, smoothing=5):
+    """
+    Extract and smooth one HSV channel of the normal map, kept as uint8.
+    
+    The result lives in a shared scratch buffer and is only valid until the next call.
+    """
+    # Ensure the normal map is uint8 for conversion: 0..1 maps are scaled up, and
+    # anything else is taken as 0..255 values, so the labels can index a lookup table
+    if normal_map.dtype == np.uint8:
+        normal_map_uint8 = normal_map
+    elif normal_map.max() <= 1.0:
+        normal_map_uint8 = np.clip(normal_map * 255, 0, 255).astype(np.uint8)
+    else:
+        normal_map_uint8 = np.clip(normal_map, 0, 255).astype(np.uint8)
+    
+    height, width = normal_map_uint8.shape[:2]
+    buf = _scratch_buffers(height, width)
+    
+    # Convert to HSV color space
+    hsv = cv2.cvtColor(normal_map_uint8, cv2.COLOR_RGB2HSV, dst=buf['hsv'])
+    
+    # Choose HSV component
+    component = hsv[:, :, hsv_channel]
+    
+    # Apply smoothing
+    if smoothing > 0:
+        component = cv2.GaussianBlur(component, (smoothing, smoothing), 0, dst=buf['component'])
+    
+    return component
+
+def _band_labels(component, bands):
+    """
+    Label each pixel of a prepared uint8 component with its evenly spaced band.
+    """
+    # Bands are evenly spaced, so each value's band follows from one scale and round;
+    # with a uint8 component that only needs working out for the 256 possible values
+    min_val, max_val, _, _ = cv2.minMaxLoc(component)
+    step = (max_val - min_val) / bands
+    label_type = np.uint8 if bands <= 256 else np.int32
+    if step > 0:
+        lut = np.ceil((np.arange(256, dtype=np.float32) - min_val) / step) - 1
+        np.clip(lut, 0, bands - 1, out=lut)
+        return lut.astype(label_type)[component]
+    return np.zeros(component.shape[:2], dtype=label_type)
+
+def _contours_from_labels(labels, cleanup=False):
+    """
+    Trace the edges between neighboring band labels.
+    """
+    # Get dimensions
+    height, width = labels.shape[:2]
+    buf = _scratch_buffers(height, width)
+    
+    # Contours are where neighboring labels differ
+    edges = buf['edges']
+    edges[0, :] = False
+    np.not_equal(labels[1:, :], labels[:-1, :], out=edges[1:, :])
+    np.not_equal(labels[:, 1:], labels[:, :-1], out=buf['diff'])
+    edges[:, 1:] |= buf['diff']
+    
+    if not cleanup:
+        return edges.view(np.uint8) * 255
+    
+    # Optional: Clean up the contours by closing 1-pixel horizontal gaps
+    # Use a horizontal kernel to preserve horizontal lines
+    contour_map = np.multiply(edges.view(np.uint8), 255, out=buf['contour'])
+    kernel = np.ones((1, 3), np.uint8)
+    cv2.dilate(contour_map, kernel, dst=buf['closed'])
+    return cv2.erode(buf['closed'], kernel)
+
+def generate_normal_band_contours_hsv(normal_map, bands=15, hsv_channel=0, smoothing=5, cleanup=False):
+    """
+    Generate evenly spaced contours based on a specific component of the normal map
+    using HSV color space.
+    
+    Args:
+        normal_map: RGB normal map
+        bands: Number of contour bands to generate
+        hsv_channel: Which HSV channel to use (0=Hue, 1=Saturation, 2=Value)
+        smoothing: Size of Gaussian blur kernel for smoothing
+        cleanup: Close 1-pixel horizontal gaps in the contours (one extra pass)
+    
+    Returns:
+        contour_map: Binary image with band contours
+    """
+    component = _prepare_component(normal_map, hsv_channel, smoothing)
+    return _contours_from_labels(_band_labels(component, bands), cleanup)
+
+def generate_normal_band_contours_hsv_list(normal_map, bands_list, hsv_channel=0, smoothing=5,
+                                          cleanup=False):
+    """
+    Generate contour maps for several band counts at once.
+    
+    Returns:
+        contour_maps: One binary contour image per entry of bands_list
+    """
+    # The HSV conversion and blur don't depend on the band count, so do them once
+    component = _prepare_component(normal_map, hsv_channel, smoothing)
+    
+    # Label once with a band count every setting divides; since bands are evenly
+    # spaced, each coarser labeling is an integer division of the fine one
+    fine_bands = math.lcm(*bands_list)
+    fine_labels = _band_labels(component, fine_bands)
+    
+    return [_contours_from_labels(fine_labels // (fine_bands // bands), cleanup) for bands in bands_list]
+
+def apply_contours_to_normal_map(normal_map, contour_map, contour_color=[1, 1, 1]):
+    """
+    Overlay contours on the original normal map.
+    
+    Args:
+        normal_map: Original RGB normal map (uint8; float maps are taken to be in 0-1)
+        contour_map: Binary image with contours
+        contour_color: RGB color for contours, components in 0-1
+    
+    Returns:
+        result: uint8 normal map with contours overlaid
+    """
+    # Blend in uint8 so OpenCV can use its 8-bit saturating path
+    if normal_map.dtype != np.uint8:
+        normal_map = (normal_map * 255).astype(np.uint8)
+    
+    # Create RGB contour image
+    contour_color = np.clip(np.asarray(contour_color, dtype=np.float32) * 255, 0, 255).astype(np.uint8)
+    contour_rgb = (contour_map[:, :, None] > 0) * contour_color
+    
+    # Blend normal map with contours
+    alpha = 0.7  # Opacity of the normal map
+    beta = 1.0   # Opacity of the contours
+    
+    result = cv2.addWeighted(normal_map, alpha, contour_rgb, beta, 0)
+    return result
@@ -1,5 +1,4 @@
 import bpy
-import bmesh
 import numpy as np
 import os
 import random
@@ -7,6 +6,18 @@ import math
 from mathutils import Vector
 from time import time
 
+# Blender's bundled Python doesn't ship numba; without it strokes are drawn with NumPy
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+    
+    def njit(*args, **kwargs):
+        return lambda func: func
+    
+    prange = range
+
 def sample_texture(uv, combined_texture_pixels_data, combined_texture_image):
     if combined_texture_pixels_data is not None:
         pixel_x = int(uv.x * combined_texture_image.size[0]) % combined_texture_image.size[0]
@@ -41,19 +52,29 @@ def create_complete_coverage_painterly_maps(stroke_width_range=(8, 15), stroke_l
     
     color_map = bpy.data.images.new("ColorMap_Painterly", width=resolution, height=resolution)
     
-    # Initialize numpy arrays for images
-    normal_array = np.zeros((resolution, resolution, 4), dtype=np.float32)
-    normal_array[:, :, 0] = 0.5  # R - X
-    normal_array[:, :, 1] = 0.5  # G - Y
-    normal_array[:, :, 2] = 1.0  # B - Z
-    normal_array[:, :, 3] = 1.0  # A - Alpha
+    # Initialize 8-bit RGBA numpy arrays for images
+    normal_array = np.zeros((resolution, resolution, 4), dtype=np.uint8)
+    normal_array[:, :, 0] = 128  # R - X
+    normal_array[:, :, 1] = 128  # G - Y
+    normal_array[:, :, 2] = 255  # B - Z
+    normal_array[:, :, 3] = 255  # A - Alpha
+    
+    color_array = np.full((resolution, resolution, 4), 255, dtype=np.uint8)
     
-    color_array = np.ones((resolution, resolution, 4), dtype=np.float32)
+    # Create a mask to track which pixels belong to which object; a byte per pixel
+    # holds up to 255 objects, with the largest value marking unowned pixels
+    ownership_dtype = np.uint8 if len(selected_objects) < 255 else np.uint16
+    object_ownership = np.full((resolution, resolution), np.iinfo(ownership_dtype).max, dtype=ownership_dtype)
     
-    # Create a mask to track which pixels belong to which object
-    object_ownership = np.full((resolution, resolution), -1, dtype=np.int32)
+    # Face normal of the triangle owning each pixel
+    normal_image = np.zeros((resolution, resolution, 3), dtype=np.float32)
     
-    # First pass: Create object masks
+    # Per-object arrays of triangles in UV pixel coordinates, with the object and face normal of each
+    triangles = []
+    triangle_objects = []
+    triangle_normals = []
+    
+    # First pass: Create object masks and normals
     for obj_index, obj in enumerate(selected_objects):
         print(f"Creating mask for object {obj_index+1}/{len(selected_objects)}: {obj.name}")
         
@@ -73,104 +94,68 @@ def create_complete_coverage_painterly_maps(stroke_width_range=(8, 15), stroke_l
             bpy.ops.object.mode_set(mode='OBJECT')
             print(f"  UV unwrapping completed for {obj.name}")
         
-        # Create BMesh for this object
-        bm = bmesh.new()
-        bm.from_mesh(obj.data)
-        bm.faces.ensure_lookup_table()
+        mesh = obj.data
         
         # Make sure we have UV data
-        uv_layer = bm.loops.layers.uv.active
+        uv_layer = mesh.uv_layers.active
         if uv_layer is None:
             print(f"  Error: No active UV layer found for {obj.name} even after unwrapping")
-            bm.free()
             continue
         
-        # Fill object mask with UV coordinates
-        for face in bm.faces:
-            if len(face.loops) < 3:
-                continue
-                
-            # Get UVs for this face
-            uvs = [loop[uv_layer].uv for loop in face.loops]
-            pixel_uvs = [(int(uv.x * (resolution-1)), int(uv.y * (resolution-1))) for uv in uvs]
-            
-            # Triangulate the face
-            for i in range(1, len(face.loops) - 1):
-                tri_uvs = [pixel_uvs[0], pixel_uvs[i], pixel_uvs[i+1]]
-                
-                # Calculate bounding box for the triangle
-                min_x = max(0, min(x for x, y in tri_uvs))
-                max_x = min(resolution-1, max(x for x, y in tri_uvs))
-                min_y = max(0, min(y for x, y in tri_uvs))
-                max_y = min(resolution-1, max(y for x, y in tri_uvs))
-                
-                # Fill the triangle in the mask
-                for y in range(min_y, max_y + 1):
-                    for x in range(min_x, max_x + 1):
-                        if is_point_in_triangle((x, y), tri_uvs):
-                            object_ownership[y, x] = obj_index
+        # Bulk-copy the face normals, face loop ranges and loop UVs into NumPy arrays
+        num_faces = len(mesh.polygons)
+        
+        face_normals = np.empty(num_faces * 3, dtype=np.float32)
+        mesh.polygons.foreach_get("normal", face_normals)
+        face_normals = face_normals.reshape(-1, 3)
+        
+        loop_starts = np.empty(num_faces, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_start", loop_starts)
+        loop_totals = np.empty(num_faces, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", loop_totals)
+        
+        loop_uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        uv_layer.data.foreach_get("uv", loop_uvs)
+        pixel_uvs = (loop_uvs.reshape(-1, 2).astype(np.float64) * (resolution-1)).astype(np.int64)
+        
+        # Triangulate each face as a fan of (first, i, i+1) loops for i = 1 .. total-2
+        tri_counts = np.maximum(loop_totals - 2, 0)
+        tri_faces = np.repeat(np.arange(num_faces), tri_counts)
+        fan = np.arange(len(tri_faces)) - np.repeat(np.cumsum(tri_counts) - tri_counts, tri_counts) + 1
+        first = loop_starts[tri_faces]
+        tri_loops = np.stack((first, first + fan, first + fan + 1), axis=1)
         
-        bm.free()
+        triangles.append(pixel_uvs[tri_loops])
+        triangle_objects.append(np.full(len(tri_faces), obj_index, dtype=ownership_dtype))
+        triangle_normals.append(face_normals[tri_faces])
+    
+    # Fill all the triangles in the mask and the normal image, later objects overwriting earlier ones
+    if triangles:
+        fill_triangles(object_ownership, normal_image, np.concatenate(triangles),
+                       np.concatenate(triangle_objects), np.concatenate(triangle_normals), resolution)
     
     # Second pass: Generate complete coverage strokes for each object
     for obj_index, obj in enumerate(selected_objects):
         print(f"Adding brush strokes for object {obj_index+1}/{len(selected_objects)}: {obj.name}")
         
-        # Create BMesh again for normal calculations
-        bm = bmesh.new()
-        bm.from_mesh(obj.data)
-        bm.faces.ensure_lookup_table()
-        
-        # Calculate normals
-        bm.normal_update()
-        
-        # Get UV layer
-        uv_layer = bm.loops.layers.uv.active
-        
         # Get object color and texture
         obj_color = get_object_color(obj)
         combined_texture_image, combined_texture_pixels_data = get_object_texture(obj)
         
-        # Create a mapping of pixels to face normals
-        pixel_to_normal = {}
-        
-        for face in bm.faces:
-            if len(face.loops) < 3:
-                continue
-                
-            # Get face normal
-            face_normal = face.normal
-            
-            # Get UVs for this face
-            uvs = [loop[uv_layer].uv for loop in face.loops]
-            pixel_uvs = [(int(uv.x * (resolution-1)), int(uv.y * (resolution-1))) for uv in uvs]
-            
-            # Triangulate the face
-            for i in range(1, len(face.loops) - 1):
-                tri_uvs = [pixel_uvs[0], pixel_uvs[i], pixel_uvs[i+1]]
-                
-                # Calculate bounding box for the triangle
-                min_x = max(0, min(x for x, y in tri_uvs))
-                max_x = min(resolution-1, max(x for x, y in tri_uvs))
-                min_y = max(0, min(y for x, y in tri_uvs))
-                max_y = min(resolution-1, max(y for x, y in tri_uvs))
-                
-                # Fill the triangle with normals
-                for y in range(min_y, max_y + 1):
-                    for x in range(min_x, max_x + 1):
-                        if is_point_in_triangle((x, y), tri_uvs):
-                            pixel_to_normal[(x, y)] = face_normal
-        
         # Find all pixels owned by this object
-        obj_pixels = np.argwhere(object_ownership == obj_index)
+        owned = object_ownership == obj_index
+        obj_pixels = np.argwhere(owned)
         
         if len(obj_pixels) == 0:
             print(f"  No pixels found for object {obj.name}")
-            bm.free()
             continue
         
         print(f"  Found {len(obj_pixels)} pixels for object {obj.name}")
         
+        # Bounding box of the object's pixels; grid cells outside it hold none
+        obj_min_y, obj_min_x = obj_pixels.min(axis=0)
+        obj_max_y, obj_max_x = obj_pixels.max(axis=0)
+        
         # Calculate grid spacing based on stroke size
         avg_stroke_width = (stroke_width_range[0] + stroke_width_range[1]) / 2
         avg_stroke_length = (stroke_length_range[0] + stroke_length_range[1]) / 2
@@ -185,24 +170,29 @@ def create_complete_coverage_painterly_maps(stroke_width_range=(8, 15), stroke_l
         # Create a grid of stroke centers
         coverage_grid = np.zeros((resolution // grid_size + 1, resolution // grid_size + 1), dtype=bool)
         
-        # Create a set of all object pixels for quick lookup
-        obj_pixels_set = set((x, y) for y, x in obj_pixels)
+        # Grid cells overlapping the object's bounding box
+        grid_ys = range(obj_min_y // grid_size * grid_size, obj_max_y + 1, grid_size)
+        grid_xs = range(obj_min_x // grid_size * grid_size, obj_max_x + 1, grid_size)
+        num_cells = len(grid_ys) * len(grid_xs)
+        
+        # Draw the random stroke parameters for every cell in one batch
+        angle_offsets = np.random.uniform(-math.pi/4, math.pi/4, num_cells)
+        stroke_widths = np.random.randint(stroke_width_range[0], stroke_width_range[1] + 1, num_cells)
+        stroke_lengths = np.random.randint(stroke_length_range[0], stroke_length_range[1] + 1, num_cells)
+        color_variations = np.random.uniform(-0.05, 0.05, (num_cells, 3))
+        
+        # Varied object colors with less variation for more consistency
+        varied_colors = np.ones((num_cells, 4))
+        np.clip(np.asarray(obj_color) + color_variations, 0.0, 1.0, out=varied_colors[:, :3])
         
         # Place strokes in a grid pattern to ensure complete coverage
-        for grid_y in range(0, resolution, grid_size):
-            for grid_x in range(0, resolution, grid_size):
-                # Check if any pixel in this grid cell belongs to the object
-                cell_has_obj_pixel = False
-                
-                for y in range(grid_y, min(grid_y + grid_size, resolution)):
-                    for x in range(grid_x, min(grid_x + grid_size, resolution)):
-                        if (x, y) in obj_pixels_set:
-                            cell_has_obj_pixel = True
-                            break
-                    if cell_has_obj_pixel:
-                        break
+        for row, grid_y in enumerate(grid_ys):
+            for col, grid_x in enumerate(grid_xs):
+                cell_index = row * len(grid_xs) + col
                 
-                if not cell_has_obj_pixel:
+                # Check if any pixel in this grid cell belongs to the object
+                cell = owned[grid_y:grid_y + grid_size, grid_x:grid_x + grid_size]
+                if not cell.any():
                     continue
                 
                 # Find a suitable pixel in this grid cell
@@ -212,27 +202,19 @@ def create_complete_coverage_painterly_maps(stroke_width_range=(8, 15), stroke_l
                 center_x = grid_x + grid_size // 2
                 center_y = grid_y + grid_size // 2
                 
-                if (center_x, center_y) in obj_pixels_set:
+                if center_x < resolution and center_y < resolution and owned[center_y, center_x]:
                     best_pixel = (center_x, center_y)
                 else:
-                    # Try to find any pixel in this cell that belongs to the object
-                    for y in range(grid_y, min(grid_y + grid_size, resolution)):
-                        for x in range(grid_x, min(grid_x + grid_size, resolution)):
-                            if (x, y) in obj_pixels_set:
-                                best_pixel = (x, y)
-                                break
-                        if best_pixel:
-                            break
+                    # Take the first pixel in this cell that belongs to the object
+                    cell_ys, cell_xs = np.nonzero(cell)
+                    best_pixel = (grid_x + int(cell_xs[0]), grid_y + int(cell_ys[0]))
                 
                 if not best_pixel:
                     continue
                 
                 # Get the pixel normal
                 x, y = best_pixel
-                if (x, y) not in pixel_to_normal:
-                    continue
-                
-                normal = pixel_to_normal[(x, y)]
+                normal = Vector(normal_image[y, x])
                 
                 # Calculate stroke direction (tangent to normal)
                 up = Vector((0, 0, 1))
@@ -243,13 +225,13 @@ def create_complete_coverage_painterly_maps(stroke_width_range=(8, 15), stroke_l
                     tangent.normalize()
                 
                 # Add randomness to direction
-                angle = math.atan2(tangent.y, tangent.x) + random.uniform(-math.pi/4, math.pi/4)
+                angle = math.atan2(tangent.y, tangent.x) + angle_offsets[cell_index]
                 dir_x = math.cos(angle)
                 dir_y = math.sin(angle)
                 
                 # Stroke parameters - random width and length
-                stroke_width = random.randint(stroke_width_range[0], stroke_width_range[1])
-                stroke_length = random.randint(stroke_length_range[0], stroke_length_range[1])
+                stroke_width = int(stroke_widths[cell_index])
+                stroke_length = int(stroke_lengths[cell_index])
                 
                 # Calculate stroke endpoints
                 half_length = stroke_length / 2
@@ -272,14 +254,7 @@ def create_complete_coverage_painterly_maps(stroke_width_range=(8, 15), stroke_l
                     sampled_color = sample_texture(uv_coord, combined_texture_pixels_data, combined_texture_image)
                     varied_color = np.array(sampled_color)
                 else:
-                    # Varied object color with less variation for more consistency
-                    color_variation = np.random.uniform(-0.05, 0.05, 3)
-                    varied_color = np.array([
-                        max(0.0, min(1.0, obj_color[0] + color_variation[0])),
-                        max(0.0, min(1.0, obj_color[1] + color_variation[1])),
-                        max(0.0, min(1.0, obj_color[2] + color_variation[2])),
-                        1.0
-                    ])
+                    varied_color = varied_colors[cell_index]
                 
                 # Draw the brush strokes
                 draw_brush_stroke(normal_array, x0, y0, x1, y1, normal_color, stroke_width, 
@@ -293,38 +268,40 @@ def create_complete_coverage_painterly_maps(stroke_width_range=(8, 15), stroke_l
                 if grid_cell_x < len(coverage_grid) and grid_cell_y < len(coverage_grid[0]):
                     coverage_grid[grid_cell_x, grid_cell_y] = True
         
-        bm.free()
-        
         # Check coverage and add additional strokes if needed
         covered_cells = np.sum(coverage_grid)
-        total_cells = np.sum(np.zeros_like(coverage_grid))
+        total_cells = coverage_grid.size
         print(f"  Initial coverage: {covered_cells}/{total_cells} grid cells")
         
         # Add some random strokes for variety
         num_random_strokes = len(obj_pixels) // 1000  # Adjust as needed
         print(f"  Adding {num_random_strokes} random strokes for variety")
         
-        for _ in range(num_random_strokes):
+        # Draw the random pixels and stroke parameters in one batch
+        pixel_indices = np.random.randint(0, len(obj_pixels), num_random_strokes)
+        angles = np.random.uniform(0, 2 * math.pi, num_random_strokes)
+        stroke_widths = np.random.randint(stroke_width_range[0], stroke_width_range[1] + 1, num_random_strokes)
+        stroke_lengths = np.random.randint(stroke_length_range[0], stroke_length_range[1] + 1, num_random_strokes)
+        color_variations = np.random.uniform(-0.1, 0.1, (num_random_strokes, 3))
+        
+        # More vibrant color variation for the random strokes
+        varied_colors = np.ones((num_random_strokes, 4))
+        np.clip(np.asarray(obj_color) + color_variations, 0.0, 1.0, out=varied_colors[:, :3])
+        
+        for i in range(num_random_strokes):
             # Pick a random pixel owned by this object
-            if len(obj_pixels) == 0:
-                continue
-                
-            idx = random.randint(0, len(obj_pixels) - 1)
-            y, x = obj_pixels[idx]
+            y, x = obj_pixels[pixel_indices[i]]
             
-            if (x, y) not in pixel_to_normal:
-                continue
-                
-            normal = pixel_to_normal[(x, y)]
+            normal = Vector(normal_image[y, x])
             
             # Random direction
-            angle = random.uniform(0, 2 * math.pi)
+            angle = angles[i]
             dir_x = math.cos(angle)
             dir_y = math.sin(angle)
             
             # Random stroke parameters
-            stroke_width = random.randint(stroke_width_range[0], stroke_width_range[1])
-            stroke_length = random.randint(stroke_length_range[0], stroke_length_range[1])
+            stroke_width = int(stroke_widths[i])
+            stroke_length = int(stroke_lengths[i])
             
             # Calculate stroke endpoints
             half_length = stroke_length / 2
@@ -347,13 +324,7 @@ def create_complete_coverage_painterly_maps(stroke_width_range=(8, 15), stroke_l
                 sampled_color = sample_texture(uv_coord, combined_texture_pixels_data, combined_texture_image)
                 varied_color = np.array(sampled_color)
             else:
-                # More vibrant color variation for the random strokes
-                color_variation = np.random.uniform(-0.1, 0.1, 3)
-                varied_color = np.array([
-                    max(0.0, min(1.0, obj_color[0] + color_variation[0])),
-                    max(0.0, min(1.0, obj_color[1] + color_variation[1])),
-                    max(0.0, min(1.0, obj_color[2] + color_variation[2])),
-                    1.0 ])
+                varied_color = varied_colors[i]
             
             # Draw random brush strokes with lower opacity for variety
             draw_brush_stroke(normal_array, x0, y0, x1, y1, normal_color, stroke_width, 
@@ -361,12 +332,15 @@ def create_complete_coverage_painterly_maps(stroke_width_range=(8, 15), stroke_l
             draw_brush_stroke(color_array, x0, y0, x1, y1, varied_color, stroke_width,
                              resolution, object_ownership, obj_index, opacity=0.6)
     
-    # Convert numpy arrays to Blender pixels
-    normal_pixels = normal_array.flatten()
-    color_pixels = color_array.flatten()
+    # Convert numpy arrays to Blender pixels, scaling in place
+    normal_pixels = normal_array.astype(np.float32).ravel()
+    normal_pixels /= 255.0
+    color_pixels = color_array.astype(np.float32).ravel()
+    color_pixels /= 255.0
     
-    normal_map.pixels = normal_pixels.tolist()
-    color_map.pixels = color_pixels.tolist()
+    # Copy them straight into the Blender pixel buffers
+    normal_map.pixels.foreach_set(normal_pixels)
+    color_map.pixels.foreach_set(color_pixels)
     
     # Save to desktop
     desktop_path = os.path.join(os.path.expanduser("~"), "Desktop")
@@ -394,57 +368,49 @@ def create_complete_coverage_painterly_maps(stroke_width_range=(8, 15), stroke_l
 
 def draw_brush_stroke(image_array, x0, y0, x1, y1, color, thickness, resolution, mask, obj_index, opacity=0.8):
     """Draw a thick brush stroke with tapered ends for a more painterly look"""
+    # The canvas is 8-bit RGBA; blend in fixed point with opacity out of 256
+    color8 = np.clip(np.round(np.asarray(color[:3], dtype=np.float64) * 255), 0, 255).astype(np.uint32)
+    alpha = int(opacity * 256)
+    inv_alpha = 256 - alpha
+    
     # Make sure points are in bounds
-    x0 = max(0, min(resolution-1, x0))
-    y0 = max(0, min(resolution-1, y0))
-    x1 = max(0, min(resolution-1, x1))
-    y1 = max(0, min(resolution-1, y1))
+    x0 = max(0, min(resolution-1, int(x0)))
+    y0 = max(0, min(resolution-1, int(y0)))
+    x1 = max(0, min(resolution-1, int(x1)))
+    y1 = max(0, min(resolution-1, int(y1)))
     
     # Calculate line parameters
     dx = abs(x1 - x0)
     dy = abs(y1 - y0)
-    sx = 1 if x0 < x1 else -1
-    sy = 1 if y0 < y1 else -1
-    err = dx - dy
     
     # Get total line length for tapering
     line_length = math.sqrt(dx*dx + dy*dy)
     if line_length == 0:
         line_length = 1
     
-    # For each point on the line
+    # Taper the stroke width - thicker in middle, thinner at ends - as a table
+    # of brush half-widths, one for each step of the line
+    t = np.arange(max(dx, dy) + 1) / line_length
+    half_widths = np.maximum(1, (thickness * (1.0 - 0.5 * (2*t - 1)**2)).astype(np.int64)) // 2
+    
+    if HAVE_NUMBA:
+        # Each pixel as one little-endian 32-bit word: R | G << 8 | B << 16 | A << 24
+        pixels = image_array.view(np.uint32)[:, :, 0]
+        src = int(color8[0]) | int(color8[1]) << 8 | int(color8[2]) << 16 | 0xff000000
+        _draw_brush_stroke_nb(pixels, mask, x0, y0, x1, y1, src, half_widths,
+                              alpha, obj_index, resolution)
+        return
+    
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx - dy
+    
+    # Collect the points on the line
     x, y = x0, y0
-    step_count = 0
+    points = []
     
     while True:
-        # Calculate position along the line (0 to 1)
-        t = step_count / line_length
-        
-        # Taper the stroke width - thicker in middle, thinner at ends
-        local_thickness = int(thickness * (1.0 - 0.5 * (2*t - 1)**2))
-        local_thickness = max(1, local_thickness)
-        
-        # Define bounds of the brush square
-        half_t = local_thickness // 2
-        min_x = max(0, x - half_t)
-        max_x = min(resolution - 1, x + half_t)
-        min_y = max(0, y - half_t)
-        max_y = min(resolution - 1, y + half_t)
-        
-        # Create a slice for the brush region
-        region = image_array[min_y:max_y+1, min_x:max_x+1]
-        mask_region = mask[min_y:max_y+1, min_x:max_x+1]
-        
-        # Create masks for object ownership
-        ownership_mask = (mask_region == obj_index)
-        
-        # Apply color blending only where the object owns the pixels
-        if np.any(ownership_mask):
-            for c in range(3):  # For R, G, B channels
-                region[ownership_mask, c] = region[ownership_mask, c] * (1 - opacity) + color[c] * opacity
-            
-            # Set alpha to 1.0
-            region[ownership_mask, 3] = 1.0
+        points.append((x, y))
         
         # Exit condition
         if x == x1 and y == y1:
@@ -458,37 +424,222 @@ def draw_brush_stroke(image_array, x0, y0, x1, y1, color, thickness, resolution,
         if e2 < dx:
             err += dx
             y += sy
-            
+    
+    points = np.array(points)
+    xs, ys = points[:, 0], points[:, 1]
+    
+    # Bounds of the brush square at each point
+    min_xs = np.maximum(0, xs - half_widths)
+    max_xs = np.minimum(resolution - 1, xs + half_widths)
+    min_ys = np.maximum(0, ys - half_widths)
+    max_ys = np.minimum(resolution - 1, ys + half_widths)
+    
+    # Count how many brush squares cover each pixel of the stroke's bounding box,
+    # by adding each square's corners into a difference array and summing it up
+    box_x, box_y = min_xs.min(), min_ys.min()
+    box_w, box_h = max_xs.max() - box_x + 1, max_ys.max() - box_y + 1
+    coverage = np.zeros((box_h + 1, box_w + 1), dtype=np.int32)
+    np.add.at(coverage, (min_ys - box_y, min_xs - box_x), 1)
+    np.add.at(coverage, (min_ys - box_y, max_xs + 1 - box_x), -1)
+    np.add.at(coverage, (max_ys + 1 - box_y, min_xs - box_x), -1)
+    np.add.at(coverage, (max_ys + 1 - box_y, max_xs + 1 - box_x), 1)
+    coverage = coverage.cumsum(axis=0).cumsum(axis=1)[:box_h, :box_w]
+    
+    # Apply color blending only where the object owns the pixels
+    region = image_array[box_y:box_y + box_h, box_x:box_x + box_w]
+    ownership_mask = (coverage > 0) & (mask[box_y:box_y + box_h, box_x:box_x + box_w] == obj_index)
+    if not ownership_mask.any():
+        return
+    counts = coverage[ownership_mask]
+    
+    # Every square blends the same color, so a pixel covered n times takes the
+    # value of the 8-bit blend applied n times, looked up per channel
+    blended = np.empty((counts.max() + 1, 3, 256), dtype=np.uint32)
+    blended[0] = np.arange(256, dtype=np.uint32)
+    for n in range(1, len(blended)):
+        blended[n] = (blended[n - 1] * inv_alpha + color8[:, None] * alpha + 128) >> 8
+    
+    for c in range(3):  # For R, G, B channels
+        region[ownership_mask, c] = blended[counts, c, region[ownership_mask, c]]
+    
+    # Set alpha to 1.0
+    region[ownership_mask, 3] = 255
+
+@njit(fastmath=True)
+def _draw_brush_stroke_nb(pixels, mask, x0, y0, x1, y1, src, half_widths, alpha,
+                          obj_index, resolution):
+    """
+    Compiled draw_brush_stroke: the same walk with its table of tapered half-widths,
+    blending packed RGBA words.
+    
+    The walk only counts how many brush squares cover each pixel of the stroke's
+    bounding box; each owned pixel is then loaded and stored once, blended that
+    many times. Red/blue and green/alpha are blended as two 16-bit lanes of one
+    word each, (dst * (256 - alpha) + src * alpha + 128) >> 8 per channel.
+    """
+    inv_alpha = 256 - alpha
+    src_rb = (src & 0x00ff00ff) * alpha + 0x00800080
+    src_ga = ((src >> 8) & 0x00ff00ff) * alpha + 0x00800080
+    
+    dx = abs(x1 - x0)
+    dy = abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx - dy
+    
+    # Bounding box of every brush square along the line
+    max_half_t = half_widths.max()
+    box_x = max(0, min(x0, x1) - max_half_t)
+    box_y = max(0, min(y0, y1) - max_half_t)
+    box_w = min(resolution - 1, max(x0, x1) + max_half_t) - box_x + 1
+    box_h = min(resolution - 1, max(y0, y1) + max_half_t) - box_y + 1
+    coverage = np.zeros((box_h + 1, box_w + 1), dtype=np.int32)
+    
+    x, y = x0, y0
+    step_count = 0
+    
+    while True:
+        # Add the brush square's corners to the difference array
+        half_t = half_widths[step_count]
+        min_x = max(0, x - half_t) - box_x
+        max_x = min(resolution - 1, x + half_t) - box_x + 1
+        min_y = max(0, y - half_t) - box_y
+        max_y = min(resolution - 1, y + half_t) - box_y + 1
+        coverage[min_y, min_x] += 1
+        coverage[min_y, max_x] -= 1
+        coverage[max_y, min_x] -= 1
+        coverage[max_y, max_x] += 1
+        
+        if x == x1 and y == y1:
+            break
+        
+        e2 = 2 * err
+        if e2 > -dy:
+            err -= dy
+            x += sx
+        if e2 < dx:
+            err += dx
+            y += sy
+        
         step_count += 1
+    
+    # Sum the difference array into per-pixel coverage counts
+    for yy in range(1, box_h):
+        for xx in range(box_w):
+            coverage[yy, xx] += coverage[yy - 1, xx]
+    for yy in range(box_h):
+        for xx in range(1, box_w):
+            coverage[yy, xx] += coverage[yy, xx - 1]
+    
+    for yy in range(box_h):
+        for xx in range(box_w):
+            count = coverage[yy, xx]
+            if count == 0 or mask[box_y + yy, box_x + xx] != obj_index:
+                continue
+            
+            dst = pixels[box_y + yy, box_x + xx]
+            rb = dst & 0x00ff00ff
+            ga = (dst >> 8) & 0x00ff00ff
+            for _ in range(count):
+                rb = ((rb * inv_alpha + src_rb) >> 8) & 0x00ff00ff
+                ga = ((ga * inv_alpha + src_ga) >> 8) & 0x00ff00ff
+            pixels[box_y + yy, box_x + xx] = rb | ga << 8 | 0xff000000
 
-def is_point_in_triangle(point, triangle):
-    """Check if point is inside triangle using barycentric coordinates"""
-    px, py = point
+def rasterize_tri(triangle, resolution):
+    """
+    Find the pixels inside a triangle with integer pixel coordinates.
+    
+    Returns (ys, xs) index arrays, or None if the triangle is degenerate or off the image.
+    """
     (ax, ay), (bx, by), (cx, cy) = triangle
+    if (bx - ax) * (cy - ay) - (by - ay) * (cx - ax) == 0:
+        return None  # Degenerate triangle
+    
+    # Calculate bounding box for the triangle
+    min_x = max(0, min(ax, bx, cx))
+    max_x = min(resolution-1, max(ax, bx, cx))
+    min_y = max(0, min(ay, by, cy))
+    max_y = min(resolution-1, max(ay, by, cy))
+    if min_x > max_x or min_y > max_y:
+        return None
     
-    # Compute vectors
-    v0x, v0y = cx - ax, cy - ay
-    v1x, v1y = bx - ax, by - ay
-    v2x, v2y = px - ax, py - ay
-    
-    # Compute dot products
-    d00 = v0x * v0x + v0y * v0y
-    d01 = v0x * v1x + v0y * v1y
-    d11 = v1x * v1x + v1y * v1y
-    d20 = v2x * v0x + v2y * v0y
-    d21 = v2x * v1x + v2y * v1y
-    
-    # Compute barycentric coordinates
-    denom = d00 * d11 - d01 * d01
-    if abs(denom) < 0.00001:
-        return False  # Degenerate triangle
-    
-    v = (d11 * d20 - d01 * d21) / denom
-    w = (d00 * d21 - d01 * d20) / denom
-    u = 1.0 - v - w
-    
-    # Point is inside if all barycentric coordinates are >= 0 and sum to 1
-    return (u >= 0) and (v >= 0) and (w >= 0)
+    # Edge functions of the three edges over the bounding box; a pixel is inside
+    # when it is on the same side of all of them (either winding)
+    ys, xs = np.mgrid[min_y:max_y+1, min_x:max_x+1]
+    e0 = (bx - ax) * (ys - ay) - (by - ay) * (xs - ax)
+    e1 = (cx - bx) * (ys - by) - (cy - by) * (xs - bx)
+    e2 = (ax - cx) * (ys - cy) - (ay - cy) * (xs - cx)
+    inside = ((e0 >= 0) & (e1 >= 0) & (e2 >= 0)) | ((e0 <= 0) & (e1 <= 0) & (e2 <= 0))
+    
+    return ys[inside], xs[inside]
+
+def fill_triangles(mask, normal_image, triangles, values, normals, resolution):
+    """
+    Set the pixels of mask and normal_image inside each triangle (integer pixel
+    coordinates) to the triangle's value and normal, in one walk over its pixels.
+    Triangles are filled in order, so later triangles overwrite earlier ones.
+    """
+    # Bounding boxes clipped to the image for all triangles at once
+    tri_min = np.maximum(triangles.min(axis=1), 0)
+    tri_max = np.minimum(triangles.max(axis=1), resolution - 1)
+    
+    # Drop degenerate triangles and ones entirely off the image
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+    keep = (area != 0) & np.all(tri_min <= tri_max, axis=1)
+    triangles, values, normals = triangles[keep], values[keep], normals[keep]
+    tri_min, tri_max = tri_min[keep], tri_max[keep]
+    
+    if HAVE_NUMBA:
+        _fill_triangles_nb(mask, normal_image, triangles, tri_min, tri_max, values, normals, resolution)
+        return
+    
+    for triangle, value, normal in zip(triangles, values, normals):
+        covered = rasterize_tri(triangle, resolution)
+        if covered is not None:
+            mask[covered] = value
+            normal_image[covered] = normal
+
+# Rows of the mask filled by each parallel task
+FILL_BAND_HEIGHT = 16
+
+@njit(parallel=True, fastmath=True)
+def _fill_triangles_nb(mask, normal_image, triangles, tri_min, tri_max, values, normals, resolution):
+    """
+    Compiled triangle fill with the same exact integer edge test as rasterize_tri.
+    
+    Bands of rows are filled in parallel; each band walks the triangles in order,
+    so overlapping triangles resolve exactly as they would one after another.
+    """
+    num_bands = (resolution + FILL_BAND_HEIGHT - 1) // FILL_BAND_HEIGHT
+    for band in prange(num_bands):
+        band_min_y = band * FILL_BAND_HEIGHT
+        band_max_y = min(resolution, band_min_y + FILL_BAND_HEIGHT) - 1
+        
+        for t in range(len(triangles)):
+            ax, ay = triangles[t, 0, 0], triangles[t, 0, 1]
+            bx, by = triangles[t, 1, 0], triangles[t, 1, 1]
+            cx, cy = triangles[t, 2, 0], triangles[t, 2, 1]
+            
+            min_y = max(band_min_y, tri_min[t, 1])
+            max_y = min(band_max_y, tri_max[t, 1])
+            if min_y > max_y:
+                continue
+            
+            min_x, max_x = tri_min[t, 0], tri_max[t, 0]
+            value = values[t]
+            nx, ny, nz = normals[t, 0], normals[t, 1], normals[t, 2]
+            
+            for y in range(min_y, max_y + 1):
+                for x in range(min_x, max_x + 1):
+                    e0 = (bx - ax) * (y - ay) - (by - ay) * (x - ax)
+                    e1 = (cx - bx) * (y - by) - (cy - by) * (x - bx)
+                    e2 = (ax - cx) * (y - cy) - (ay - cy) * (x - cx)
+                    if (e0 >= 0 and e1 >= 0 and e2 >= 0) or (e0 <= 0 and e1 <= 0 and e2 <= 0):
+                        mask[y, x] = value
+                        normal_image[y, x, 0] = nx
+                        normal_image[y, x, 1] = ny
+                        normal_image[y, x, 2] = nz
 
 def get_object_color(obj):
     """Extract the base color of an object from its materials"""